@@ -59,6 +59,7 @@ export default function CoachDashboard() {
     // Biomechanics State
     const [videoFile, setVideoFile] = useState<File | null>(null);
     const [bioData, setBioData] = useState<any>(null);
+    const [videoProgress, setVideoProgress] = useState<number | null>(null);
     const videoInputRef = useRef<HTMLInputElement>(null);
 
     // Squad State
@@ -117,16 +118,29 @@ export default function CoachDashboard() {
         }
     };
 
+    // analyze_video queues a job (202); poll it until the VisionEngine result is ready
+    const waitForVideoJob = async (job: any) => {
+        while (job.status !== "done") {
+            if (job.status === "failed") throw new Error(job.error || "Video analysis failed");
+            setVideoProgress(job.progress || 0);
+            await new Promise((resolve) => setTimeout(resolve, 1000));
+            job = await fetchAPI(`/biometrics/jobs/${job.job_id}`);
+        }
+        return job.result;
+    };
+
     const handleAnalysis = async () => {
         if (!videoFile) return;
         setIsProcessing(true);
+        setVideoProgress(0);
         try {
-            const data = await api.analyzeVideo(videoFile);
-            setBioData(data);
+            const job = await api.analyzeVideo(videoFile);
+            setBioData(await waitForVideoJob(job));
         } catch (err) {
             console.error(err);
         } finally {
             setIsProcessing(false);
+            setVideoProgress(null);
         }
     };
 
@@ -194,24 +208,45 @@ export default function CoachDashboard() {
 
     // --- RENDER HELPERS ---
 
+    // Per-frame series come downsampled per column ({frame: [...], value: [...]}): merge them on frame
+    const SERIES_KEYS: Record<string, string> = {
+        left_valgus: "valgusLeft", right_valgus: "valgusRight",
+        left_hip_deviation: "hipLeft", right_hip_deviation: "hipRight",
+    };
+
     const getChartData = () => {
-        if (!bioData) return Array.from({ length: 50 }, (_, i) => ({ frame: i, flexion: 0, valgus: 0, forceLeft: 0, forceRight: 0 }));
-        return bioData.frames.map((f: number, i: number) => ({
-            frame: f,
-            flexion: bioData.timeseries.flexion[i],
-            valgus: bioData.timeseries.valgus[i],
-            forceLeft: bioData.timeseries.grf_left[i],
-            forceRight: bioData.timeseries.grf_right[i]
-        }));
+        const series = bioData?.timeseries?.series;
+        if (!series) return Array.from({ length: 50 }, (_, i) => ({ frame: i, valgusLeft: 0, valgusRight: 0, hipLeft: 0, hipRight: 0 }));
+        const rows: Record<number, any> = {};
+        Object.entries(SERIES_KEYS).forEach(([column, key]) => {
+            const s = series[column];
+            if (!s) return;
+            s.frame.forEach((f: number, i: number) => {
+                rows[f] = { ...(rows[f] || { frame: f }), [key]: s.value[i] };
+            });
+        });
+        return Object.values(rows).sort((a: any, b: any) => a.frame - b.frame);
     };
 
     const getAsymmetryData = () => {
-        if (!bioData) return [];
-        const maxLeft = Math.max(...bioData.timeseries.grf_left);
-        const maxRight = Math.max(...bioData.timeseries.grf_right);
+        if (!bioData?.legs) return [];
         return [
-            { name: "Left Leg", value: maxLeft, color: "#00CC96" },
-            { name: "Right Leg", value: maxRight, color: "#AB63FA" }
+            { name: "Left Leg", value: bioData.legs.left.valgus, color: "#00CC96" },
+            { name: "Right Leg", value: bioData.legs.right.valgus, color: "#AB63FA" }
+        ];
+    };
+
+    // 0-100 scores from the measured leg summaries (50 until a clip is analyzed)
+    const getRadarData = () => {
+        const score = (v: number) => Math.round(Math.max(0, Math.min(100, v)));
+        const legs = bioData?.legs;
+        if (!legs) return ["Stability", "Symmetry", "Hip Control", "Strike"].map((subject) => ({ subject, A: 50, fullMark: 100 }));
+        const worstValgus = Math.max(legs.left.valgus, legs.right.valgus);
+        return [
+            { subject: "Stability", A: score(100 - worstValgus * 4), fullMark: 100 },
+            { subject: "Symmetry", A: score(100 - Math.abs(legs.left.valgus - legs.right.valgus) * 5), fullMark: 100 },
+            { subject: "Hip Control", A: score(100 - Math.max(legs.left.hip_ratio, legs.right.hip_ratio) * 1000), fullMark: 100 },
+            { subject: "Strike", A: score(100 - Math.max(0, -legs.right.shin_angle) * 5), fullMark: 100 },
         ];
     };
 
@@ -321,7 +356,7 @@ export default function CoachDashboard() {
                                     )}
                                 >
                                     {isProcessing ? (
-                                        <>Processing Kinetics...</>
+                                        <>Processing Kinetics... {videoProgress !== null && `${Math.round(videoProgress * 100)}%`}</>
                                     ) : (
                                         <><Play className="w-5 h-5" /> Execute Physics Engine</>
                                     )}
@@ -332,13 +367,21 @@ export default function CoachDashboard() {
                                         <h3 className="text-sm font-bold text-[#8B949E] uppercase mb-4">Metric Snapshot</h3>
                                         <div className="grid grid-cols-2 gap-4">
                                             <div>
-                                                <p className="text-xs text-[#8B949E]">ACL Risk</p>
-                                                <p className="text-2xl font-bold text-[#EF553B]">{bioData.metrics.acl_risk}</p>
+                                                <p className="text-xs text-[#8B949E]">Knee State</p>
+                                                <p className="text-2xl font-bold text-[#EF553B]">{bioData.metrics.critical_state}</p>
                                             </div>
                                             <div>
                                                 <p className="text-xs text-[#8B949E]">Peak Valgus</p>
                                                 <p className="text-2xl font-bold text-[#EF553B]">{bioData.metrics.peak_valgus}</p>
                                             </div>
+                                            <div>
+                                                <p className="text-xs text-[#8B949E]">Hip Rotation</p>
+                                                <p className="text-sm font-bold text-white">{bioData.metrics.hip_rotation}</p>
+                                            </div>
+                                            <div>
+                                                <p className="text-xs text-[#8B949E]">Foot Strike</p>
+                                                <p className="text-sm font-bold text-white">{bioData.metrics.foot_strike}</p>
+                                            </div>
                                         </div>
                                     </GlassCard>
                                 )}
@@ -357,39 +400,33 @@ export default function CoachDashboard() {
                                     </GlassCard>
                                     <GlassCard>
                                         <h3 className="font-bold mb-4">Athlete vs Elite Benchmark</h3>
-                                        <BioRadar data={[
-                                            { subject: 'Stability', A: bioData?.radar.athlete[0] || 50, fullMark: 100 },
-                                            { subject: 'Force', A: bioData?.radar.athlete[2] || 60, fullMark: 100 },
-                                            { subject: 'Power', A: bioData?.radar.athlete[4] || 70, fullMark: 100 },
-                                            { subject: 'Mobility', A: bioData?.radar.athlete[3] || 60, fullMark: 100 },
-                                            { subject: 'Symmetry', A: bioData?.radar.athlete[1] || 40, fullMark: 100 },
-                                        ]} />
+                                        <BioRadar data={getRadarData()} />
                                     </GlassCard>
                                 </div>
 
                                 {/* Graph 3: Joint Angle */}
                                 <GlassCard>
-                                    <h3 className="font-bold mb-4">Joint Angle Timeline</h3>
+                                    <h3 className="font-bold mb-4">Knee Valgus Timeline</h3>
                                     <GenericLineChart
                                         data={getChartData()}
                                         xAxisKey="frame"
                                         lines={[
-                                            { key: 'flexion', color: '#636EFA', name: 'Flexion' },
-                                            { key: 'valgus', color: '#EF553B', name: 'Valgus Stress' }
+                                            { key: 'valgusLeft', color: '#636EFA', name: 'Left Valgus (°)' },
+                                            { key: 'valgusRight', color: '#EF553B', name: 'Right Valgus (°)' }
                                         ]}
                                     />
                                 </GlassCard>
 
                                 <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
-                                    {/* Graph 4: GRF */}
+                                    {/* Graph 4: Knee tracking (GRF isn't measurable from pose) */}
                                     <GlassCard>
-                                        <h3 className="font-bold mb-4">Ground Reaction Force</h3>
+                                        <h3 className="font-bold mb-4">Knee Tracking (Hip Deviation)</h3>
                                         <GenericLineChart
                                             data={getChartData()}
                                             xAxisKey="frame"
                                             lines={[
-                                                { key: 'forceLeft', color: '#00CC96', name: 'Left Leg' },
-                                                { key: 'forceRight', color: '#AB63FA', name: 'Right Leg' }
+                                                { key: 'hipLeft', color: '#00CC96', name: 'Left Leg' },
+                                                { key: 'hipRight', color: '#AB63FA', name: 'Right Leg' }
                                             ]}
                                         />
                                     </GlassCard>
@@ -399,7 +436,7 @@ export default function CoachDashboard() {
                                         <GenericBarChart
                                             data={getAsymmetryData()}
                                             xAxisKey="name"
-                                            bars={[{ key: "value", color: "#636EFA", name: "Force (N)" }]}
+                                            bars={[{ key: "value", color: "#636EFA", name: "Peak Valgus (°)" }]}
                                         />
                                     </GlassCard>
                                 </div>
@@ -1,16 +1,25 @@
 # app/api/v1/endpoints/analytics.py
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Any
+from sqlalchemy import func, or_, tuple_
+from typing import List, Any, Optional
+from app.core.config import settings
 from app.db.database import get_db
 from app.db.models import PlayerHistory
-from app.schemas.analytics import AnalysisInput, AnalysisResponse, LogEntryInput
+from app.schemas.analytics import AnalysisInput, AnalysisResponse, LogEntryInput, SquadForecastInput, SquadForecastResponse
 from app.ml.anomaly_engine import AnomalyService
+from app.services.analysis_service import AnalysisService
+from app.services import acwr_service, anomaly_stream, bulk_ingest, daily_state, history_export
 import numpy as np
-from datetime import datetime
+import base64
+import json
+from datetime import date, datetime
 
 router = APIRouter()
 anomaly_service = AnomalyService()
+analysis_service = AnalysisService()
 
 @router.post("/log", summary="Log Daily Metrics & Update Twin")
 def log_daily_metrics(
@@ -48,6 +57,27 @@ def log_daily_metrics(
         alerts = []
         if knee_risk == "High": alerts.append("🚨 High Knee Load Detected")
         if ankle_risk == "High": alerts.append("🚨 Ankle/Calf Soreness Critical")
+
+        # 4. Streaming anomaly check against the player's 28-day window (no history re-scan)
+        try:
+            anomaly = anomaly_stream.observe(db, new_entry)
+            alerts.extend(f"🚨 {label} vs 28-day baseline" for label in anomaly["types"])
+        except Exception as e:
+            print(f"⚠️ Anomaly stream error: {e}")
+            anomaly = None
+
+        # 5. Fold the session into the cached squad ACWR
+        try:
+            acwr_service.observe(db, new_entry)
+        except Exception as e:
+            print(f"⚠️ ACWR update error: {e}")
+
+        # 6. Keep the materialized daily state in step
+        try:
+            daily_state.record(db, new_entry)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Daily state update error: {e}")
         
         return {
             "status": "success", 
@@ -56,7 +86,8 @@ def log_daily_metrics(
                 "knee_risk": knee_risk,
                 "ankle_risk": ankle_risk,
                 "acute_load": acute_load,
-                "alerts": alerts
+                "alerts": alerts,
+                "anomaly": anomaly
             }
         }
         
@@ -64,32 +95,176 @@ def log_daily_metrics(
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/log/bulk", summary="Bulk Import Daily Logs (JSON / NDJSON / CSV)")
+async def log_daily_metrics_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, description="json, ndjson or csv (default: from Content-Type / file name)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Imports many daily logs in one request: a JSON array, NDJSON lines or a CSV file
+    (raw body or multipart `file`) with LogEntryInput columns. Rows are validated and
+    inserted in batches; invalid rows are skipped and reported by position.
+    Bodies over BULK_INGEST_MAX_BYTES are rejected with 413 before anything is parsed.
+    """
+    max_bytes = settings.BULK_INGEST_MAX_BYTES
+    too_large = HTTPException(status_code=413, detail=f"Upload larger than {max_bytes} bytes, split it")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise too_large
+
+    filename = None
+    if request.headers.get("content-type", "").startswith("multipart/"):
+        upload = (await request.form()).get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart upload needs a 'file' field")
+        filename, body = upload.filename, await upload.read(max_bytes + 1)
+    else:
+        # No (or a wrong) Content-Length: count while streaming instead of trusting it
+        chunks, size = [], 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise too_large
+            chunks.append(chunk)
+        body = b"".join(chunks)
+    if len(body) > max_bytes:
+        raise too_large
+
+    fmt = format or bulk_ingest.detect_format(
+        None if filename else request.headers.get("content-type"), filename, body
+    )
+    if fmt not in bulk_ingest.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'")
+
+    try:
+        # Parsing and inserts are blocking: keep them off the event loop
+        return await run_in_threadpool(bulk_ingest.ingest, db, body, fmt)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Keyset columns: always returned so the next page can be requested
+HISTORY_KEYS = ("id", "player_id", "session_date")
+HISTORY_COLUMNS = {c.name: c for c in PlayerHistory.__table__.columns}
+# Legacy rows (e.g. upload_me.sql seeds) have no player_id / session_date: paged by id after the keyed ones
+LEGACY_ROWS = or_(PlayerHistory.player_id.is_(None), PlayerHistory.session_date.is_(None))
+
+def _encode_cursor(row) -> str:
+    if row.player_id is None or row.session_date is None:
+        key = [row.id]
+    else:
+        key = [row.player_id, row.session_date.isoformat(), row.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    """ (player_id, session_date, id) for a keyed-row cursor, (id,) once into the legacy rows. """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(key) == 1:
+            return (int(key[0]),)
+        player_id, session_date, row_id = key
+        return player_id, datetime.fromisoformat(session_date), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/history", summary="Fetch History from Supabase")
 def get_player_history(
-    player_id: str = None, 
+    player_id: str = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated columns, e.g. load,hrv,sleep"),
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=5000),
     db: Session = Depends(get_db)
 ) -> Any:
     """
-    Fetch training history directly from the Supabase database.
-    Optional: Filter by player_id if provided.
+    Fetch training history directly from the Supabase database, one page at a time.
+    Optional: filter by player_id and session_date range, project columns with `fields`.
+    Pages are keyset-paginated on (player_id, session_date, id): pass `next_cursor` back
+    as `cursor` for the next page, so deep pages cost the same as the first. Rows without
+    a player_id / session_date come last, keyset-paginated on id.
     """
-    query = db.query(PlayerHistory)
-    
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in HISTORY_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        names = list(HISTORY_KEYS) + [f for f in requested if f not in HISTORY_KEYS]
+    else:
+        names = list(HISTORY_COLUMNS)
+    columns = [HISTORY_COLUMNS[name] for name in names]
+
+    # Plain column rows (no ORM hydration)
+    query = db.query(*columns)
+
     # If the frontend sends a specific player ID, filter for it
     if player_id:
         query = query.filter(PlayerHistory.player_id == player_id)
-    
-    # Execute the query
-    history_data = query.all()
-    
-    if not history_data:
-        return {"msg": "No history data found", "data": []}
+    if since:
+        query = query.filter(PlayerHistory.session_date >= since)
+    if until:
+        query = query.filter(PlayerHistory.session_date <= until)
+    key = _decode_cursor(cursor) if cursor else None
 
-    return {"data": history_data}
+    # Execute the query (one extra row tells us whether another page exists)
+    rows = []
+    if key is None or len(key) == 3:
+        keyed = query.filter(PlayerHistory.player_id.isnot(None), PlayerHistory.session_date.isnot(None))
+        if key:
+            keyed = keyed.filter(tuple_(PlayerHistory.player_id, PlayerHistory.session_date, PlayerHistory.id) > key)
+        rows = keyed.order_by(
+            PlayerHistory.player_id, PlayerHistory.session_date, PlayerHistory.id
+        ).limit(limit + 1).all()
+    if len(rows) <= limit:
+        # Keyed rows exhausted: fill the page from the legacy rows
+        legacy = query.filter(LEGACY_ROWS)
+        if key and len(key) == 1:
+            legacy = legacy.filter(PlayerHistory.id > key[0])
+        rows += legacy.order_by(PlayerHistory.id).limit(limit + 1 - len(rows)).all()
+
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    history_data = [dict(row._mapping) for row in rows[:limit]]
+
+    if not history_data and not cursor:
+        return {"msg": "No history data found", "data": [], "next_cursor": None}
+
+    return {"data": history_data, "next_cursor": next_cursor}
+
+@router.get("/history/export", summary="Stream History as Arrow IPC")
+def export_player_history(
+    player_id: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+):
+    """
+    Streams player_history as an Arrow IPC stream (one record batch per chunk),
+    for bulk consumers such as squad retraining. Needs pyarrow on the server.
+    """
+    try:
+        history_export.history_schema()
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return StreamingResponse(
+        history_export.arrow_ipc_stream(player_ids=player_id, since=since),
+        media_type="application/vnd.apache.arrow.stream",
+    )
+
+@router.get("/daily_state", summary="Materialized Daily Player State")
+def get_daily_state(
+    player_id: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    Precomputed per-player-per-day rows: daily load / HRV / sleep, rolling and EWMA
+    ACWR inputs and recovery baselines. Maintained on /log (no aggregation per request).
+    """
+    return {"data": daily_state.query_states(db, player_id, since, until).all()}
 
 @router.post("/analyze", response_model=AnalysisResponse, summary="Run AI Anomaly Detection")
 def analyze_metrics(
-    payload: AnalysisInput = Body(...)
+    payload: AnalysisInput = Body(...),
+    db: Session = Depends(get_db)
 ):
     """
     Main AI Engine Endpoint.
@@ -113,9 +288,20 @@ def analyze_metrics(
     state_assessment = "Optimal"
     action = "Maintain Load"
     confidence = 95
-    
-    if payload.load_metrics:
+
+    # Measured ACWR (from player_history) once the player has a chronic window of history,
+    # else the typed-in value
+    acwr = None
+    if payload.log_entry:
+        try:
+            acwr = acwr_service.measured_acwr(db, [payload.log_entry.player_id]).get(payload.log_entry.player_id)
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Measured ACWR unavailable, using load_metrics: {e}")
+    if acwr is None and payload.load_metrics:
         acwr = payload.load_metrics.acwr
+
+    if acwr is not None:
         if acwr > 1.5:
             state_assessment = "Overreaching"
             action = "De-load (-20%)"
@@ -133,8 +319,8 @@ def analyze_metrics(
     # 3. Generate Forecast (Mock Projection)
     # Simple linear projection modified by current fatigue
     base_risk = 10
-    if payload.load_metrics:
-        base_risk += (payload.load_metrics.acwr * 10)
+    if acwr is not None:
+        base_risk += (acwr * 10)
     if payload.wellness:
         base_risk += (10 - payload.wellness.mood_score)
         
@@ -164,4 +350,72 @@ def analyze_metrics(
             "load_vol": load_vol,
             "recovery_tank": recovery_tank
         }
-    )
\ No newline at end of file
+    )
+
+@router.get("/acwr", summary="Squad Acute:Chronic Workload Ratio")
+def get_squad_acwr(
+    player_id: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Current 7/28-day rolling and EWMA ACWR for every player (or the given player_ids),
+    computed from player_history loads. Served from the cached squad state.
+    """
+    return acwr_service.squad_acwr(db, player_id)
+
+@router.post("/forecast/batch", response_model=SquadForecastResponse, summary="Batched 15-Day Squad Forecast")
+def forecast_squad_batch(
+    payload: SquadForecastInput = Body(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Forecasts the whole squad in a single batched GRU rollout.
+    Players sent without history use their last 7 days from player_daily_state
+    (raw player_history rows if the player hasn't been backfilled yet).
+    """
+    histories = {p.player_id: p.history for p in payload.players if p.history}
+    missing = [p.player_id for p in payload.players if not p.history]
+
+    if missing:
+        # Last 7 days from the materialized daily state (one query)
+        histories.update(daily_state.recent_matrix(db, missing, days=7))
+        missing = [pid for pid in missing if pid not in histories]
+
+    if missing:
+        # Not backfilled yet: rank raw rows per player, keep the latest 7
+        rank = func.row_number().over(
+            partition_by=PlayerHistory.player_id,
+            order_by=PlayerHistory.session_date.desc()
+        ).label("rank")
+        recent = (
+            db.query(
+                PlayerHistory.player_id,
+                PlayerHistory.session_date,
+                func.coalesce(PlayerHistory.load, 0).label("load"),
+                func.coalesce(PlayerHistory.hrv, 0).label("hrv"),
+                func.coalesce(PlayerHistory.sleep, PlayerHistory.sleep_hours, 0).label("sleep"),
+                rank,
+            )
+            .filter(PlayerHistory.player_id.in_(missing))
+            .subquery()
+        )
+        rows = (
+            db.query(recent.c.player_id, recent.c.load, recent.c.hrv, recent.c.sleep)
+            .filter(recent.c.rank <= 7)
+            .order_by(recent.c.player_id, recent.c.session_date)
+            .all()
+        )
+        for row in rows:
+            histories.setdefault(row.player_id, []).append([row.load, row.hrv, row.sleep])
+
+    ordered = {p.player_id: histories.get(p.player_id, []) for p in payload.players}
+    curves = analysis_service.forecast_squad(ordered, payload.horizon)
+
+    return SquadForecastResponse(
+        horizon=payload.horizon,
+        forecasts=[{"player_id": pid, "forecast": curve} for pid, curve in curves.items()]
+    )
+
+@router.on_event("shutdown")
+def snapshot_anomaly_stream():
+    anomaly_stream.save_snapshot()
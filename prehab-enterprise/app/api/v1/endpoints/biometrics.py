@@ -1,44 +1,65 @@
-from fastapi import APIRouter, File, UploadFile
-from typing import List
-import numpy as np
+import json
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.services import video_service
+from app.services.video_service import video_jobs
 
 router = APIRouter()
 
-@router.post("/analyze_video")
-async def analyze_video(file: UploadFile = File(...)):
-    # Simulate processing time
-    # In a real scenario, we'd save the file and run CV models
-    
-    # Generate Mock Data (matching the Streamlit output)
-    frames = list(range(0, 50))
-    
-    # Kinematics
-    knee_flexion = [45 + 15 * np.sin(i/5) for i in frames]
-    valgus_stress = [5 + 2 * np.cos(i/3) + np.random.normal(0, 0.5) for i in frames]
-    
-    # Kinetics (GRF)
-    # Left leg active frames 10-40, Right 12-42
-    grf_left = [0 if i < 10 or i > 40 else 800 + 100*np.random.randn() for i in frames]
-    grf_right = [0 if i < 12 or i > 42 else 750 + 100*np.random.randn() for i in frames]
-
-    return {
-        "status": "success",
-        "frames": frames,
-        "metrics": {
-            "acl_risk": "78.5%",
-            "peak_valgus": "18.5°",
-            "landing_force": "3.2 BW",
-            "critical_state": "Unstable"
-        },
-        "timeseries": {
-            "flexion": knee_flexion,
-            "valgus": valgus_stress,
-            "grf_left": grf_left,
-            "grf_right": grf_right
-        },
-        "radar": {
-            "athlete": [50, 40, 80, 60, 70],
-            "elite": [90, 95, 80, 85, 90],
-            "categories": ['Stability', 'Symmetry', 'Force', 'Mobility', 'Power']
-        }
-    }
+@router.post("/analyze_video", status_code=202)
+async def analyze_video(
+    file: UploadFile = File(...),
+    mode: str = Query("single", description="'single' athlete or 'squad' (track every athlete in the clip)"),
+):
+    """
+    Streams the clip to disk and queues a VisionEngine job.
+    Returns a job id immediately; poll /jobs/{job_id} (or /jobs/{job_id}/events) for the result.
+    """
+    if mode not in video_service.ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {video_service.ANALYSIS_MODES}")
+    path, content_hash = await video_service.save_upload(file)
+    job_id = await run_in_threadpool(video_jobs.submit, path, content_hash, file.filename, mode)
+    return await run_in_threadpool(video_jobs.get, job_id)
+
+@router.get("/jobs/{job_id}")
+def get_video_job(job_id: str, points: Optional[int] = Query(None, ge=3, le=10000)):
+    """ Job status; once done, `points` sets the resolution of the per-frame kinematics series. """
+    job = video_jobs.get(job_id, points)
+    if not job:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    return job
+
+@router.get("/jobs/{job_id}/events")
+async def stream_video_job(job_id: str, points: Optional[int] = Query(None, ge=3, le=10000)):
+    """ Server-sent events: one message per progress change, ending with the final result. """
+    # Job reads go through the Manager proxy (blocking IPC): keep them off the event loop
+    if not await run_in_threadpool(video_jobs.get, job_id):
+        raise HTTPException(status_code=404, detail="Video job not found")
+
+    async def events():
+        last = None
+        while True:
+            job = await run_in_threadpool(video_jobs.get, job_id, points)
+            if job is None:
+                break
+            state = (job["status"], job["progress"])
+            if state != last:
+                last = state
+                yield f"data: {json.dumps(job)}\n\n"
+            if job["status"] in ("done", "failed"):
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@router.get("/cache/stats")
+def video_cache_stats():
+    """ Hit / miss counters and disk usage of the video analysis cache. """
+    return video_service.video_cache.stats()
+
+@router.on_event("shutdown")
+def shutdown_video_jobs():
+    video_jobs.shutdown()
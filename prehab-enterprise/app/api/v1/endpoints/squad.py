@@ -1,95 +1,89 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException
-import pandas as pd
-import io
-import numpy as np
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.models.squad_snapshot import SquadSnapshot
+from app.services import squad_service
 
 router = APIRouter()
 
 @router.post("/upload_csv")
-async def upload_squad_csv(file: UploadFile = File(...)):
-    if not file.filename.endswith('.csv'):
-        raise HTTPException(status_code=400, detail="Invalid file format. Please upload a CSV.")
+async def upload_squad_csv(
+    file: UploadFile = File(...),
+    squad: str = Query("default", description="Squad whose snapshot history this upload extends"),
+    db: Session = Depends(get_db)
+):
+    """
+    Processes a squad CSV / XLSX into Squad Manager KPIs and charts and stores them as the
+    squad's next snapshot version (`snapshot` in the response). Re-uploading the same
+    file returns its existing snapshot without recomputing.
+    """
+    if not squad_service.is_supported(file.filename):
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload a CSV or XLSX.")
     
     try:
-        content = await file.read()
-        df = pd.read_csv(io.BytesIO(content))
-        
-        # Clean columns
-        df.columns = df.columns.str.strip()
-        
-        # Required columns validation (simplified)
-        required_cols = ['Player', 'Risk Score', 'Acute Load', 'Recovery']
-        if not all(col in df.columns for col in required_cols):
-             # Fallback for demo if CSV doesn't match exactly, or just proceed if they have some data
-             pass
-
-        # Calculate KPIs
-        avg_risk = float(df['Risk Score'].mean())
-        avg_load = float(df['Acute Load'].mean())
-        high_risk_count = int(len(df[df['Risk Score'] > 50]))
-        
-        # Data for Charts
-        
-        # 3. Data for Charts (ENSURE 5 GRAPHS)
-        
-        # Graph 1: Load vs Recovery Scatter
-        scatter_data = df[['Player', 'Acute Load', 'Recovery', 'Risk Score']].to_dict(orient='records')
-        
-        # Graph 2: Risk Zone Distribution (Pie)
-        risk_zones = [
-            {"name": "Green Zone", "value": int(len(df[df['Risk Score'] <= 30])), "color": "#00CC96"},
-            {"name": "Orange Zone", "value": int(len(df[(df['Risk Score'] > 30) & (df['Risk Score'] <= 60)])), "color": "#FFA15A"},
-            {"name": "Red Zone", "value": int(len(df[df['Risk Score'] > 60])), "color": "#EF553B"}
-        ]
+        # Parse straight from the spooled upload (no full in-memory copy), off the event loop
+        return await run_in_threadpool(squad_service.process_upload, db, file.file, file.filename, squad)
 
-        # Graph 3: ACWR Distribution (Bar)
-        # Mocking or extracting ACWR if present, else using Acute Load
-        acwr_data = []
-        for _, row in df.iterrows():
-            acwr_data.append({"name": row['Player'], "value": row.get('Acute Load', 0) / 700}) # Mock calc
+    except Exception as e:
+        print(f"Error processing CSV: {e}")
+        # Return Dummy Data so UI doesn't crash if CSV is bad
+        return squad_service.empty_report()
 
-        # Graph 4: Training Compliance (Donut)
-        # Mock compliance data
-        compliance_data = [
-            {"name": "Completed", "value": 92, "color": "#00CC96"},
-            {"name": "Missed", "value": 8, "color": "#EF553B"}
+@router.get("/snapshots", summary="List Squad Snapshots")
+def list_squad_snapshots(
+    squad: str = "default",
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db)
+):
+    """ Snapshot versions of a squad, newest first (metadata only). """
+    snapshots = (
+        db.query(SquadSnapshot)
+        .filter(SquadSnapshot.squad == squad)
+        .order_by(SquadSnapshot.version.desc())
+        .limit(limit)
+        .all()
+    )
+    return {
+        "data": [
+            {**squad_service.snapshot_meta(s), "etag": s.etag, "created_at": s.created_at}
+            for s in snapshots
         ]
+    }
 
-        # Graph 5: Wellness vs Load Trend (Multi-Line / Combined)
-        # Sorting by Acute Load to show trend
-        sorted_df = df.sort_values(by='Acute Load')
-        trend_data = []
-        for _, row in sorted_df.iterrows():
-            trend_data.append({
-                "name": row['Player'],
-                "load": row['Acute Load'],
-                "recovery": row['Recovery']
-            })
-        
-        return {
-            "status": "success",
-            "kpis": {
-                "squad_readiness": "85%",
-                "high_risk_players": high_risk_count,
-                "avg_load": round(avg_load, 1),
-                "compliance": "98%"
-            },
-            "charts": {
-                "scatter": scatter_data,
-                "risk_zones": risk_zones,
-                "acwr_dist": acwr_data,
-                "compliance": compliance_data,
-                "trend": trend_data
-            }
-        }
+def _snapshot_response(db: Session, query, if_none_match: Optional[str], cache_control: str) -> Response:
+    """ 304 if the client's ETag still matches (only the etag column is read), else the stored payload. """
+    row = query.with_entities(SquadSnapshot.id, SquadSnapshot.etag).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    headers = {"ETag": f'"{row.etag}"', "Cache-Control": cache_control}
+    if squad_service.etag_matches(if_none_match, row.etag):
+        return Response(status_code=304, headers=headers)
+    report = db.query(SquadSnapshot.report).filter(SquadSnapshot.id == row.id).scalar()
+    return Response(content=report, media_type="application/json", headers=headers)
 
-    except Exception as e:
-        print(f"Error processing CSV: {e}")
-        # Return Dummy Data so UI doesn't crash if CSV is bad
-        return {
-            "status": "error",
-            "kpis": {"squad_readiness": "0%", "high_risk_players": 0, "avg_load": 0, "compliance": "0%"},
-            "charts": {
-                "scatter": [], "risk_zones": [], "acwr_dist": [], "compliance": [], "trend": []
-            }
-        }
+@router.get("/snapshots/latest", summary="Latest Squad Snapshot")
+def get_latest_squad_snapshot(
+    squad: str = "default",
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """ Newest snapshot of a squad; clients revalidate with If-None-Match on every refresh. """
+    query = (
+        db.query(SquadSnapshot)
+        .filter(SquadSnapshot.squad == squad)
+        .order_by(SquadSnapshot.version.desc())
+    )
+    return _snapshot_response(db, query, if_none_match, "no-cache")
+
+@router.get("/snapshots/{snapshot_id}", summary="Squad Snapshot")
+def get_squad_snapshot(
+    snapshot_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """ Precomputed KPIs and chart series of one snapshot (immutable, ETag / If-None-Match aware). """
+    query = db.query(SquadSnapshot).filter(SquadSnapshot.id == snapshot_id)
+    return _snapshot_response(db, query, if_none_match, "private, max-age=31536000, immutable")
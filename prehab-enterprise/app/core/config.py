@@ -15,6 +15,59 @@ class Settings(BaseSettings):
     # FALLBACK: SQLite - Now with fixed table creation in main.py
     DATABASE_URL: str = "sqlite:///./prehab_v5.db"
 
+    # Import torch / ultralytics at startup instead of on first use
+    PRELOAD_ML_ENGINES: bool = False
+
+    # VIDEO ANALYSIS RESULT CACHE
+    VIDEO_CACHE_DIR: str = "./video_cache"
+    VIDEO_CACHE_MAX_MB: int = 512
+
+    # VIDEO ANALYSIS JOBS (process pool)
+    VIDEO_WORKERS: int = 2
+    VIDEO_JOB_HISTORY: int = 200
+    VIDEO_TIMESERIES_POINTS: int = 200  # Default chart resolution for per-frame kinematics
+    VISION_SAMPLING: str = "adaptive"  # "adaptive" (motion-driven) or "fixed" (every 3rd frame)
+    VISION_INFERENCE_BUDGET: int = 600  # Max pose inferences per clip in adaptive mode
+
+    # STREAMING ANOMALY DETECTOR (per-player rolling windows)
+    ANOMALY_SNAPSHOT_PATH: str = "./anomaly_state.npz"
+    ANOMALY_SNAPSHOT_EVERY: int = 50  # Snapshot after this many /log updates (and on shutdown)
+
+    # SQUAD ACWR (from player_history loads)
+    ACWR_LOOKBACK_DAYS: int = 120  # History read on rebuild (older days no longer move the EWMAs)
+    ACWR_REFRESH_SECONDS: int = 300  # Full rebuild interval, picks up rows logged by other workers
+
+    # COLUMNAR HISTORY EXPORT (Arrow / Parquet, needs pyarrow)
+    HISTORY_EXPORT_DIR: str = "./history_parquet"  # Dataset root, partitioned player_id=/month=
+    HISTORY_EXPORT_CHUNK_ROWS: int = 50000  # Rows fetched per record batch
+
+    # BULK LOG INGEST (/analytics/log/bulk)
+    BULK_INGEST_BATCH_ROWS: int = 1000  # Rows per executemany / transaction
+    BULK_INGEST_MAX_ROWS: int = 100000  # Larger uploads are rejected (split them)
+    BULK_INGEST_MAX_BYTES: int = 50 * 1024 * 1024  # Bodies over this get a 413 before parsing
+
+    # SQUAD MANAGER UPLOADS (/squad/upload_csv)
+    SQUAD_CSV_CHUNK_ROWS: int = 50000  # Rows parsed per read_csv chunk
+
+    # GRU MODEL REGISTRY (per-player weights + scalers)
+    MODEL_STORE_DIR: str = "./model_store"
+    MODEL_CACHE_SIZE: int = 64
+    GRU_SERVE_EXPORTED: bool = True  # API serves TorchScript exports (no optimizer / autograd)
+    GRU_QUANTIZE: bool = False  # Opt-in dynamic int8 serving (CPU nodes)
+    GRU_QUANTIZE_TOLERANCE: float = 2.0  # Max forecast drift (risk points) before falling back to float
+
+    # GRU TRAINING WORKER (SQLite job queue, see app/worker.py)
+    TRAINING_QUEUE_PATH: str = "./training_queue.db"
+    TRAINING_POLL_INTERVAL: float = 1.0
+    TRAINING_RETRY_SECONDS: float = 3600.0  # A failed job with unchanged history is retried after this
+    TRAINING_WORKER_EMBEDDED: bool = True  # Spawn the worker from the API on startup
+
+    # GRU TRAINER
+    GRU_MAX_EPOCHS: int = 50
+    GRU_BATCH_SIZE: int = 32
+    GRU_PATIENCE: int = 5
+    GRU_TRAIN_BUDGET_SECONDS: float = 30.0
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,64 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of the `n_out` points that best keep the
+    visual shape of y(x). First and last points are always kept; every bucket in
+    between contributes the point forming the largest triangle with its neighbours.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the interior points [1, n - 1)
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
+def downsample_columns(
+    columns: Dict[str, np.ndarray],
+    points: int,
+    x_key: str = "frame",
+    decimals: Optional[int] = 3,
+) -> Dict[str, Dict[str, list]]:
+    """
+    Downsamples every 1-D column against the shared x column for chart payloads.
+    NaN samples (frames where a joint wasn't detected) are dropped per series first.
+    Returns {name: {x_key: [...], "value": [...]}}.
+    """
+    x = np.asarray(columns[x_key])
+    out = {}
+    for name, y in columns.items():
+        y = np.asarray(y)
+        if name == x_key or y.ndim != 1 or len(y) != len(x):
+            continue
+        valid = ~np.isnan(y)
+        xs, ys = x[valid], y[valid]
+        keep = lttb_indices(xs, ys, points)
+        values = ys[keep].astype(np.float64)
+        if decimals is not None:
+            values = np.round(values, decimals)
+        out[name] = {x_key: xs[keep].tolist(), "value": values.tolist()}
+    return out
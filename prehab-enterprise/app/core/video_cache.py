@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class VideoResultCache:
+    """
+    Content-addressed cache for video analysis.
+    Keyed by the clip's SHA-256 plus the model version and sampling parameters, so a
+    re-uploaded clip skips pose inference while any change to the model or sampling
+    naturally misses. Entries (result JSON + per-frame arrays .npz) live on local disk and
+    the least recently used ones are evicted once the directory exceeds its budget.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.VIDEO_CACHE_DIR
+        self.max_bytes = max_bytes or settings.VIDEO_CACHE_MAX_MB * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content_hash: str, model_version: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps({"video": content_hash, "model": model_version, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.json", f"{base}.npz"
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """ (result, arrays) on a hit, None on a miss. """
+        json_path, arrays_path = self._paths(key)
+        try:
+            with open(json_path) as f:
+                result = json.load(f)
+            with np.load(arrays_path) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (FileNotFoundError, ValueError, OSError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch both files: mtime is the LRU clock
+        for path in (json_path, arrays_path):
+            try: os.utime(path)
+            except FileNotFoundError: pass
+
+        with self._lock:
+            self.hits += 1
+        return result, arrays
+
+    def put(self, key: str, result: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        json_path, arrays_path = self._paths(key)
+
+        # Write-then-rename so a concurrent reader never sees a partial entry
+        with open(f"{arrays_path}.tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(f"{arrays_path}.tmp", arrays_path)
+        with open(f"{json_path}.tmp", "w") as f:
+            json.dump(result, f)
+        os.replace(f"{json_path}.tmp", json_path)
+
+        self._evict()
+
+    def _entries(self):
+        """ key -> (total bytes, last used) for every complete entry on disk. """
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext not in (".json", ".npz"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            size, used = entries.get(key, (0, 0.0))
+            entries[key] = (size + st.st_size, max(used, st.st_mtime))
+        return entries
+
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for size, _ in entries.values())
+            for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+                if total <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try: os.remove(path)
+                    except FileNotFoundError: pass
+                total -= size
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(entries),
+                "bytes": sum(size for size, _ in entries.values()),
+                "max_bytes": self.max_bytes,
+            }
@@ -1,12 +1,162 @@
-import cv2
 import math
+import time
+import queue
+import threading
 import numpy as np
-from ultralytics import YOLO
+from collections import deque
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+# Bump whenever keypoint post-processing changes (invalidates cached analyses)
+ANALYSIS_VERSION = "3"
+# Squad mode: shorter tracks are detector noise / ID switches, not athletes
+MIN_TRACK_FRAMES = 10
+# Adaptive sampling: motion energy is measured on tiny grayscale thumbnails
+MOTION_SIZE = (64, 36)
+MOTION_EWMA_ALPHA = 0.05
+
+
+class MotionSampler:
+    """
+    Online frame selector for adaptive sampling.
+    Motion energy (mean abs difference of consecutive thumbnails) is compared with
+    its running EWMA baseline: a spike (landing, cut) selects every frame from
+    `lookback` frames before it to `hold` frames after it, while quiet stretches are
+    only sampled every `sparse_stride` frames. Bursts are paid from a token bucket so
+    the whole clip stays within `budget` inferences.
+    """
+
+    def __init__(
+        self,
+        total_frames: int,
+        budget: int,
+        base_stride: int,
+        lookback: int = 6,
+        hold: int = 12,
+        sensitivity: float = 3.0,
+        min_energy: float = 2.0,
+        warmup: int = 15,
+    ):
+        self.budget = budget
+        self.lookback, self.hold = lookback, hold
+        self.sensitivity, self.min_energy, self.warmup = sensitivity, min_energy, warmup
+
+        # Token bucket for bursts: starts full, so the first landing is covered too
+        self.capacity = max(lookback + hold, budget // 10)
+        self.tokens = float(self.capacity)
+        if total_frames > 0:
+            # The sparse baseline gets at most half the budget, bursts share the rest
+            self.sparse_stride = max(base_stride, math.ceil(2 * total_frames / budget))
+            self.dense_rate = max((budget - self.capacity) / total_frames - 1 / self.sparse_stride, 0.0)
+        else:
+            # Unknown length (some containers): only the hard budget caps bursts
+            self.sparse_stride, self.dense_rate = base_stride, 1.0
+
+        self.mean = self.var = 0.0
+        self.seen = 0
+        self.hold_until = 0
+        self.selected = 0
+        self.events = 0
+        self.pending = deque() # [frame_id, frame, selected] awaiting the lookback window
+
+    def _is_event(self, energy: float) -> bool:
+        self.seen += 1
+        if self.seen == 1:
+            self.mean = energy
+        diff = energy - self.mean
+        spike = (
+            self.seen > self.warmup
+            and energy > self.min_energy
+            and diff > self.sensitivity * math.sqrt(self.var)
+        )
+        increment = MOTION_EWMA_ALPHA * diff
+        self.mean += increment
+        self.var = (1 - MOTION_EWMA_ALPHA) * (self.var + diff * increment)
+        return spike
+
+    def _take(self, entry: list, dense: bool):
+        if entry[2] or self.selected >= self.budget:
+            return
+        if dense:
+            if self.tokens < 1: return
+            self.tokens -= 1
+        entry[2] = True
+        self.selected += 1
+
+    def push(self, frame_id: int, frame, energy: float) -> list:
+        """ Feeds one decoded frame; returns the (frame_id, frame) pairs now ready for inference. """
+        self.tokens = min(self.capacity, self.tokens + self.dense_rate)
+        entry = [frame_id, frame, False]
+        self.pending.append(entry)
+
+        if self._is_event(energy):
+            if frame_id > self.hold_until:
+                self.events += 1
+            self.hold_until = frame_id + self.hold
+            for buffered in self.pending: # Lookback, oldest first
+                self._take(buffered, dense=True)
+        elif frame_id <= self.hold_until:
+            self._take(entry, dense=True)
+        elif frame_id % self.sparse_stride == 0:
+            self._take(entry, dense=False)
+
+        ready = []
+        while len(self.pending) > self.lookback:
+            ready.extend(self._pop())
+        return ready
+
+    def flush(self) -> list:
+        ready = []
+        while self.pending:
+            ready.extend(self._pop())
+        return ready
+
+    def _pop(self) -> list:
+        frame_id, frame, selected = self.pending.popleft()
+        return [(frame_id, frame)] if selected else []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "adaptive",
+            "budget": self.budget,
+            "sparse_stride": self.sparse_stride,
+            "motion_events": self.events,
+            "frames_selected": self.selected,
+        }
+
 
 class VisionEngine:
-    def __init__(self):
-        # Load YOLOv8 Pose Model
-        self.model = YOLO('yolov8n-pose.pt') 
+    def __init__(
+        self,
+        weights: str = 'yolov8n-pose.pt',
+        frame_stride: int = 3,
+        batch_size: int = 8,
+        sampling: str = "fixed",
+        inference_budget: int = 600,
+    ):
+        # YOLOv8 Pose Model - ultralytics (and cv2) are only imported on first use
+        self.weights = weights
+        self.frame_stride = frame_stride
+        self.batch_size = batch_size
+        # "fixed": every frame_stride-th frame; "adaptive": MotionSampler within inference_budget
+        self.sampling = sampling
+        self.inference_budget = inference_budget
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """ Imports ultralytics and loads the pose weights (idempotent). """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from ultralytics import YOLO
+                    self._model = YOLO(self.weights)
+        return self._model
+
+    @property
+    def model(self):
+        return self.load()
 
     def calculate_angle(self, p1, p2, p3):
         """Calculates angle between 3 points (p1-p2-p3)"""
@@ -22,93 +172,356 @@ class VisionEngine:
         cos_angle = dot_prod / (mag1 * mag2)
         return np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0)))
 
-    def analyze_video(self, video_path: str):
+    # === STREAMING PIPELINE ===
+    @staticmethod
+    def _emit(frames: queue.Queue, stop: threading.Event, item) -> None:
+        """ Blocking put that gives up once the consumer has stopped. """
+        while not stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _decode_frames(self, video_path: str, frames: queue.Queue, stop: threading.Event, stats: dict, sampling: str):
+        """
+        Decoder thread. Fixed sampling grab()s every frame (cheap, no pixel decode) and
+        only retrieve()s the ones we sample; adaptive sampling retrieves every frame for
+        its motion metric and lets MotionSampler pick. Feeds a bounded queue so decoding
+        runs ahead of inference without buffering the whole clip.
+        """
+        import cv2
+
         cap = cv2.VideoCapture(video_path)
-        
-        valgus_angles = []
-        shin_angles = []
-        hip_deviations = [] # Normalized deviation
-        
+        stats["total_frames"] = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        sampler = None
+        if sampling == "adaptive":
+            sampler = MotionSampler(stats["total_frames"], self.inference_budget, self.frame_stride)
+        previous = None
         frame_count = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret: break
-            
-            frame_count += 1
-            if frame_count % 3 != 0: # Process every 3rd frame (more samples = better accuracy)
-                continue
-            
-            results = self.model(frame, verbose=False)
-            
-            for result in results:
-                if result.keypoints and result.keypoints.data is not None:
-                    kpts = result.keypoints.data[0].cpu().numpy()
-                    if len(kpts) < 17: continue
-
-                    # === COORDINATES (Right Leg) ===
-                    # Hip(12), Knee(14), Ankle(16)
-                    r_hip = kpts[12][:2]
-                    r_knee = kpts[14][:2]
-                    r_ankle = kpts[16][:2]
-                    
-                    # Skip empty detections
-                    if np.any(r_hip == 0) or np.any(r_knee == 0) or np.any(r_ankle == 0):
+        try:
+            while not stop.is_set() and cap.grab():
+                frame_count += 1
+                if sampler is None:
+                    if frame_count % self.frame_stride != 0: # Process every 3rd frame (more samples = better accuracy)
                         continue
+                    ret, frame = cap.retrieve()
+                    if not ret: break
+                    self._emit(frames, stop, (frame_count, frame))
+                    continue
 
-                    # 1. LEG LENGTH (For Normalization)
-                    # Distance from Hip to Ankle
-                    leg_length = np.linalg.norm(r_hip - r_ankle)
-                    if leg_length == 0: continue
-
-                    # 2. HIP INTERNAL ROTATION (Normalized)
-                    # Logic: Draw a line from Hip to Ankle. How far is the Knee from this line?
-                    # Start with Midpoint X
-                    midpoint_x = (r_hip[0] + r_ankle[0]) / 2
-                    
-                    # Deviation: Knee X position relative to the center line
-                    raw_deviation = r_knee[0] - midpoint_x 
-                    
-                    # Normalize: Deviation as a % of leg length
-                    # e.g., 0.05 means knee moved 5% of leg length inward
-                    normalized_deviation = raw_deviation / leg_length
-                    hip_deviations.append(normalized_deviation)
-
-                    # 3. KNEE VALGUS (Angle)
-                    angle = self.calculate_angle(r_hip, r_knee, r_ankle)
-                    valgus_angles.append(abs(180 - angle))
-
-                    # 4. FOOT STRIKE (Shin Angle)
-                    dx = r_knee[0] - r_ankle[0]
-                    dy = r_knee[1] - r_ankle[1]
-                    if dy != 0:
-                        shin_angles.append(math.degrees(math.atan2(dx, dy)))
-
-        cap.release()
-
-        # === INTELLIGENT SCORING ===
-        
-        # A. Valgus (Angle)
-        avg_valgus = float(np.percentile(valgus_angles, 85)) if valgus_angles else 0.0
-
-        # B. Hip Rotation (Normalized Ratio)
-        # Threshold: If knee deviates > 4% of leg length (0.04), it's an issue.
-        # Note: We use absolute value to catch both inward and outward, 
-        # but internal rotation is usually the concern.
-        avg_hip_ratio = float(np.mean(np.abs(hip_deviations))) if hip_deviations else 0.0
-        
-        hip_status = "Normal"
-        if avg_hip_ratio > 0.04:  # SENSITIVITY SETTING (Lower = More Sensitive)
-            hip_status = "Excessive Internal Rotation"
+                ret, frame = cap.retrieve()
+                if not ret: break
+                thumb = cv2.cvtColor(cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+                thumb = thumb.astype(np.int16)
+                energy = float(np.abs(thumb - previous).mean()) if previous is not None else 0.0
+                previous = thumb
+                for item in sampler.push(frame_count, frame, energy):
+                    self._emit(frames, stop, item)
 
-        # C. Foot Strike
-        avg_shin = float(np.mean(shin_angles)) if shin_angles else 0.0
-        strike_type = "Midfoot/Forefoot" if avg_shin > -5 else "Heel Strike (Overstride)"
+            if sampler is not None:
+                for item in sampler.flush():
+                    self._emit(frames, stop, item)
+        except Exception as e:
+            stats["decode_error"] = e
+        finally:
+            stats["frames_read"] = frame_count
+            stats["sampling"] = sampler.stats() if sampler else {"mode": "fixed", "frame_stride": self.frame_stride}
+            cap.release()
+            # End-of-stream marker (skipped if the consumer already gave up)
+            while True:
+                try:
+                    frames.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    if stop.is_set(): break
 
-        # DEBUGGING: Print hidden stats to terminal so you can see what happened
-        print(f"DEBUG STATS -> Valgus: {avg_valgus:.1f}, Hip Ratio: {avg_hip_ratio:.4f}, Shin: {avg_shin:.1f}")
+    def _collect_keypoints(self, results, frame_ids, keypoints, frame_index):
+        """ Post-processing for one inference batch: keep each frame's (17, 3) skeleton and frame number. """
+        for result, frame_id in zip(results, frame_ids):
+            if result.keypoints and result.keypoints.data is not None and len(result.keypoints.data):
+                kpts = result.keypoints.data[0].cpu().numpy()
+                if len(kpts) < 17: continue
+                keypoints.append(kpts[:17])
+                frame_index.append(frame_id)
+
+    @property
+    def model_version(self) -> str:
+        """ Identifies weights + post-processing, part of the result cache key. """
+        return f"{self.weights}:{ANALYSIS_VERSION}"
+
+    @property
+    def sampling_params(self) -> Dict[str, Any]:
+        if self.sampling == "adaptive":
+            return {"frame_stride": self.frame_stride, "sampling": "adaptive", "inference_budget": self.inference_budget}
+        return {"frame_stride": self.frame_stride}
+
+    def _run_pipeline(
+        self,
+        video_path: str,
+        infer: Callable[[list], Any],
+        collect: Callable[[Any, list], None],
+        progress: Optional[Callable[[int, int], None]] = None,
+        sampling: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Decode -> batched inference -> post-processing, each on its own thread.
+        `infer(frames)` runs the model on one batch, `collect(results, frame_ids)`
+        consumes its output in frame order. Returns the pipeline stats.
+        """
+        sampling = sampling or self.sampling
+        frames = queue.Queue(maxsize=self.batch_size * 4)
+        stop = threading.Event()
+        stats = {"frames_read": 0, "frames_analyzed": 0}
+        started = time.perf_counter()
+
+        decoder = threading.Thread(
+            target=self._decode_frames, args=(video_path, frames, stop, stats, sampling), daemon=True
+        )
+        decoder.start()
+
+        post_processing = []
+        try:
+            with ThreadPoolExecutor(max_workers=1) as post_pool:  # 1 worker keeps frame order
+                done = False
+                while not done:
+                    batch, batch_ids = [], []
+                    while len(batch) < self.batch_size:
+                        item = frames.get()
+                        if item is None:
+                            done = True
+                            break
+                        batch_ids.append(item[0])
+                        batch.append(item[1])
+                    if not batch:
+                        continue
+
+                    results = infer(batch)
+                    stats["frames_analyzed"] += len(batch)
+                    if progress:
+                        progress(batch_ids[-1], stats.get("total_frames", 0))
+                    post_processing.append(post_pool.submit(collect, results, batch_ids))
 
+                for future in post_processing:
+                    future.result()
+        finally:
+            stop.set()
+            decoder.join()
+
+        if "decode_error" in stats:
+            raise stats["decode_error"]
+
+        elapsed = time.perf_counter() - started
         return {
-            "valgus": avg_valgus,
-            "hip_rotation": hip_status,
-            "foot_strike": strike_type
-        }
\ No newline at end of file
+            "frames_read": stats["frames_read"],
+            "frames_analyzed": stats["frames_analyzed"],
+            "seconds": round(elapsed, 3),
+            "fps": round(stats["frames_read"] / elapsed, 1) if elapsed > 0 else 0.0,
+            "sampling": stats.get("sampling"),
+        }
+
+    def analyze_video(
+        self,
+        video_path: str,
+        return_arrays: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Full clip analysis. With return_arrays, also returns the per-frame data as
+        columns: "frame", "keypoints" (frames, 17, 3) and float32 "{side}_{metric}" series.
+        `progress(frames_done, total_frames)` is called after every inference batch.
+        """
+        keypoints = [] # One (17, 3) array per analyzed frame
+        frame_index = [] # Source frame number of each skeleton
+
+        pipeline_stats = self._run_pipeline(
+            video_path,
+            lambda batch: self.model(batch, verbose=False),
+            lambda results, frame_ids: self._collect_keypoints(results, frame_ids, keypoints, frame_index),
+            progress,
+        )
+
+        # === VECTORIZED KINEMATICS (Both Legs) ===
+        kpts = np.stack(keypoints) if keypoints else np.zeros((0, 17, 3), dtype=np.float32)
+        kinematics = leg_kinematics(kpts)
+        legs = {side: summarize_leg(kin) for side, kin in kinematics.items()}
+        right = legs["right"]
+
+        # DEBUGGING: Print hidden stats to terminal so you can see what happened
+        print(f"DEBUG STATS -> Valgus: {right['valgus']:.1f}, Hip Ratio: {right['hip_ratio']:.4f}, Shin: {right['shin_angle']:.1f}")
+
+        # Headline numbers stay on the right leg (as before); both legs are in "legs"
+        result = {
+            "valgus": right["valgus"],
+            "hip_rotation": right["hip_rotation"],
+            "foot_strike": right["foot_strike"],
+            "legs": legs,
+            "pipeline": pipeline_stats
+        }
+        if not return_arrays:
+            return result
+
+        # Columnar per-frame output (one float32 array per leg metric, aligned on "frame")
+        arrays = {"frame": np.asarray(frame_index, dtype=np.int32), "keypoints": kpts}
+        for side, kin in kinematics.items():
+            for metric, series in kin.items():
+                arrays[f"{side}_{metric}"] = series
+        return result, arrays
+
+    # === MULTI-PERSON TRACKING ===
+    def _collect_tracks(self, results, frame_ids, frame_index, track_ids, keypoints):
+        """ Post-processing for one tracked batch: one (17, 3) skeleton per tracked person per frame. """
+        for result, frame_id in zip(results, frame_ids):
+            boxes = result.boxes
+            if boxes is None or boxes.id is None or result.keypoints is None or result.keypoints.data is None:
+                continue
+            ids = boxes.id.int().cpu().numpy()
+            kpts = result.keypoints.data.cpu().numpy()
+            if kpts.ndim != 3 or kpts.shape[1] < 17: continue
+            frame_index.extend([frame_id] * len(ids))
+            track_ids.extend(ids.tolist())
+            keypoints.extend(kpts[:len(ids), :17])
+
+    def analyze_tracks(
+        self,
+        video_path: str,
+        tracker: str = "bytetrack.yaml",
+        min_frames: int = MIN_TRACK_FRAMES,
+        return_arrays: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Squad mode: follows every athlete in the clip with the ultralytics tracker and
+        reports valgus / hip rotation / foot strike per track id, in a single decode pass.
+        Tracks seen in fewer than `min_frames` sampled frames (passers-by, ID switches) are dropped.
+        With return_arrays, also returns the "frame", "track_id" and "keypoints" columns.
+        """
+        # The tracker keeps state on its predictor (and would hook every later predict()
+        # call on a shared model), so each run gets its own model instance
+        from ultralytics import YOLO
+        model = YOLO(self.weights)
+
+        frame_index, track_ids, keypoints = [], [], []
+        pipeline_stats = self._run_pipeline(
+            video_path,
+            # A list of frames goes through one tracker in order, so batching is still safe
+            lambda batch: model.track(batch, persist=True, tracker=tracker, verbose=False),
+            lambda results, frame_ids: self._collect_tracks(results, frame_ids, frame_index, track_ids, keypoints),
+            progress,
+            sampling="fixed", # The tracker needs evenly spaced frames to keep ids stable
+        )
+
+        frames = np.asarray(frame_index, dtype=np.int32)
+        ids = np.asarray(track_ids, dtype=np.int32)
+        kpts = np.stack(keypoints).astype(np.float32) if keypoints else np.zeros((0, 17, 3), dtype=np.float32)
+
+        # === PER-TRACK KINEMATICS ===
+        # Kinematics are per-skeleton, so one vectorized pass covers every athlete
+        kinematics = leg_kinematics(kpts)
+        tracks = []
+        for track_id in np.unique(ids):
+            rows = ids == track_id
+            if rows.sum() < min_frames:
+                continue
+            legs = {side: summarize_leg({m: col[rows] for m, col in kin.items()}) for side, kin in kinematics.items()}
+            right = legs["right"]
+            tracks.append({
+                "track_id": int(track_id),
+                "frames": int(rows.sum()),
+                "first_frame": int(frames[rows].min()),
+                "last_frame": int(frames[rows].max()),
+                "valgus": right["valgus"],
+                "hip_rotation": right["hip_rotation"],
+                "foot_strike": right["foot_strike"],
+                "legs": legs,
+            })
+
+        print(f"DEBUG STATS -> Tracks: {len(tracks)} kept of {len(np.unique(ids))} seen")
+
+        result = {"tracks": tracks, "pipeline": pipeline_stats}
+        if not return_arrays:
+            return result
+        return result, {"frame": frames, "track_id": ids, "keypoints": kpts}
+
+
+# === KEYPOINT GEOMETRY ===
+# COCO keypoint indices: (Hip, Knee, Ankle)
+LEG_JOINTS = {"left": (11, 13, 15), "right": (12, 14, 16)}
+
+def leg_kinematics(keypoints: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Per-frame valgus, hip deviation and shin angle for both legs in one pass.
+    keypoints: (frames, 17, 3). Frames with a missing joint (or zero leg length)
+    are NaN, so summaries simply ignore them.
+    """
+    out = {}
+    for side, (h, k, a) in LEG_JOINTS.items():
+        hip, knee, ankle = keypoints[:, h, :2], keypoints[:, k, :2], keypoints[:, a, :2]
+
+        # Skip empty detections
+        valid = np.all(hip != 0, axis=1) & np.all(knee != 0, axis=1) & np.all(ankle != 0, axis=1)
+
+        # 1. LEG LENGTH (For Normalization): Hip -> Ankle distance
+        leg_length = np.hypot(*(hip - ankle).T)
+        valid &= leg_length > 0
+        safe_length = np.where(valid, leg_length, 1.0)
+
+        # 2. HIP INTERNAL ROTATION: Knee X deviation from the Hip-Ankle midline, as % of leg length
+        hip_dev = (knee[:, 0] - (hip[:, 0] + ankle[:, 0]) / 2) / safe_length
+
+        # 3. KNEE VALGUS: deviation of the Hip-Knee-Ankle angle from straight (180)
+        v1, v2 = hip - knee, ankle - knee
+        mags = np.hypot(*v1.T) * np.hypot(*v2.T)
+        cos_angle = np.einsum("ij,ij->i", v1, v2) / np.where(mags == 0, 1.0, mags)
+        angle = np.where(mags == 0, 180.0, np.degrees(np.arccos(np.clip(cos_angle, -1.0, 1.0))))
+        valgus = np.abs(180 - angle)
+
+        # 4. FOOT STRIKE: shin angle from the Ankle -> Knee vector
+        dx, dy = knee[:, 0] - ankle[:, 0], knee[:, 1] - ankle[:, 1]
+        shin = np.degrees(np.arctan2(dx, dy))
+
+        out[side] = {
+            "valgus": np.where(valid, valgus, np.nan).astype(np.float32),
+            "hip_deviation": np.where(valid, hip_dev, np.nan).astype(np.float32),
+            "shin_angle": np.where(valid & (dy != 0), shin, np.nan).astype(np.float32),
+        }
+    return out
+
+def summarize_leg(kin: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """ Collapses one leg's per-frame series into the scoring numbers. """
+    valgus = kin["valgus"][~np.isnan(kin["valgus"])]
+    hip_dev = kin["hip_deviation"][~np.isnan(kin["hip_deviation"])]
+    shin = kin["shin_angle"][~np.isnan(kin["shin_angle"])]
+
+    # A. Valgus (Angle)
+    avg_valgus = float(np.percentile(valgus, 85)) if len(valgus) else 0.0
+
+    # B. Hip Rotation (Normalized Ratio)
+    # Threshold: If knee deviates > 4% of leg length (0.04), it's an issue.
+    # Note: We use absolute value to catch both inward and outward, 
+    # but internal rotation is usually the concern.
+    avg_hip_ratio = float(np.mean(np.abs(hip_dev))) if len(hip_dev) else 0.0
+    
+    hip_status = "Normal"
+    if avg_hip_ratio > 0.04:  # SENSITIVITY SETTING (Lower = More Sensitive)
+        hip_status = "Excessive Internal Rotation"
+
+    # C. Foot Strike
+    avg_shin = float(np.mean(shin)) if len(shin) else 0.0
+    strike_type = "Midfoot/Forefoot" if avg_shin > -5 else "Heel Strike (Overstride)"
+
+    return {
+        "valgus": avg_valgus,
+        "hip_ratio": avg_hip_ratio,
+        "hip_rotation": hip_status,
+        "shin_angle": avg_shin,
+        "foot_strike": strike_type,
+        "frames": int(len(valgus)),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_vision_engine() -> VisionEngine:
+    """ Process-wide VisionEngine; the YOLO weights load on its first analysis. """
+    from app.core.config import settings
+    return VisionEngine(sampling=settings.VISION_SAMPLING, inference_budget=settings.VISION_INFERENCE_BUDGET)
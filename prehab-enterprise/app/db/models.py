@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -7,6 +7,8 @@ from app.db.database import Base
 # 2. Player History Table (Used for your CSV Data)
 class PlayerHistory(Base):
     __tablename__ = "player_history"
+    # Backs /analytics/history: player filter + keyset order (player_id, session_date, id)
+    __table_args__ = (Index("ix_player_history_player_session_id", "player_id", "session_date", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     # If your CSV has player_id as text, use String. If it's a UUID, change this to String/UUID.
@@ -34,4 +36,36 @@ class PlayerHistory(Base):
     soreness = Column(Integer, default=0)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    session_date = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    session_date = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# 3. Materialized Daily State (one row per player per training day)
+# Maintained on write by /analytics/log, rebuilt by backfill_daily_state.py
+class PlayerDailyState(Base):
+    __tablename__ = "player_daily_state"
+    __table_args__ = (UniqueConstraint("player_id", "day", name="uq_player_daily_state_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(String, index=True, nullable=False)
+    day = Column(Date, nullable=False)
+
+    # Daily aggregates of player_history
+    sessions = Column(Integer, default=0)
+    load = Column(Float, default=0) # Total load (rest days = 0)
+    hrv = Column(Float, nullable=True) # Mean of the day's readings
+    sleep = Column(Float, nullable=True)
+
+    # Rolling ACWR inputs
+    acute_load = Column(Float, nullable=True) # 7-day mean
+    chronic_load = Column(Float, nullable=True) # 28-day mean
+    acute_ewma = Column(Float, nullable=True)
+    chronic_ewma = Column(Float, nullable=True)
+    acwr = Column(Float, nullable=True)
+    acwr_ewma = Column(Float, nullable=True)
+
+    # Recovery baselines (days with a reading only)
+    hrv_baseline_7d = Column(Float, nullable=True)
+    hrv_baseline_28d = Column(Float, nullable=True)
+    sleep_avg_7d = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
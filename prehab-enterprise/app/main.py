@@ -10,9 +10,13 @@ from app.db.base_class import Base as BaseNew
 # UserDB usage replaced by User
 from app.models.user import User  
 import app.models.injury 
+import app.models.squad_snapshot
+from app.db.models import PlayerHistory
 import uuid # For ID generation
 
 from app.core import security 
+from app.worker import start_worker_process
+from app.services.analysis_service import warm_up_engines
 
 app = FastAPI(title="Prehab 2.0")
 
@@ -31,6 +35,10 @@ def startup_db():
         # 1. Create Tables for BOTH Bases
         BaseOld.metadata.create_all(bind=engine)
         BaseNew.metadata.create_all(bind=engine)
+
+        # create_all skips existing tables, so add indexes introduced later explicitly
+        for index in PlayerHistory.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
         
         # 2. Seed Data
         db = SessionLocal()
@@ -52,4 +60,25 @@ def startup_db():
     except Exception as e:
         print(f"⚠️ Warning: Database connection failed. Running in offline/demo mode. Error: {e}")
 
+# --- OPTIONAL ML WARM-UP ---
+# Engines are lazy by default; preloading trades cold-start time for first-request latency
+@app.on_event("startup")
+def startup_warm_up():
+    if settings.PRELOAD_ML_ENGINES:
+        warm_up_engines()
+
+# --- GRU TRAINING WORKER ---
+training_worker = None
+
+@app.on_event("startup")
+def startup_training_worker():
+    global training_worker
+    if settings.TRAINING_WORKER_EMBEDDED:
+        training_worker = start_worker_process()
+
+@app.on_event("shutdown")
+def shutdown_training_worker():
+    if training_worker and training_worker.is_alive():
+        training_worker.terminate()
+
 app.include_router(api_router, prefix="/api/v1")
\ No newline at end of file
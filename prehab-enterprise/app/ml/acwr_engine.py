@@ -0,0 +1,188 @@
+import threading
+import numpy as np
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+# Acute / chronic windows (days) and the matching EWMA decay (alpha = 2 / (N + 1))
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+ACUTE_ALPHA = 2 / (ACUTE_DAYS + 1)
+CHRONIC_ALPHA = 2 / (CHRONIC_DAYS + 1)
+
+# Same bands the /analyze RL heuristics use
+ZONES = ((0.8, "Detraining"), (1.3, "Optimal"), (1.5, "Caution"), (float("inf"), "Overreaching"))
+
+
+def daily_load_matrix(player_ids: Sequence[str], days: Sequence[date], loads: Sequence[float], start: date, end: date):
+    """
+    Scatters (player, day, load) rows into a dense (players, days) matrix of daily totals.
+    Days without a session are 0 load (rest days count towards the chronic average).
+    Returns (players, matrix).
+    """
+    players, player_idx = np.unique(np.asarray(player_ids, dtype=str), return_inverse=True)
+    offsets = np.array([(d - start).days for d in days], dtype=np.int64)
+    matrix = np.zeros((len(players), (end - start).days + 1))
+    keep = (offsets >= 0) & (offsets < matrix.shape[1])
+    np.add.at(matrix, (player_idx[keep], offsets[keep]), np.asarray(loads, dtype=np.float64)[keep])
+    return players.tolist(), matrix
+
+
+def rolling_mean(daily: np.ndarray, window: int) -> np.ndarray:
+    """ Trailing `window`-day mean along the day axis (cumsum difference); NaN until the window fills. """
+    csum = np.cumsum(np.pad(daily, ((0, 0), (1, 0))), axis=1)
+    out = np.full(daily.shape, np.nan)
+    out[:, window - 1:] = (csum[:, window:] - csum[:, :-window]) / window
+    return out
+
+
+def ewma(daily: np.ndarray, alpha: float, initial: Optional[np.ndarray] = None) -> np.ndarray:
+    """ Exponentially weighted daily load (starting from `initial`, default 0), vectorized over players. """
+    out = np.empty(daily.shape)
+    acc = np.zeros(daily.shape[0]) if initial is None else np.asarray(initial, dtype=np.float64).copy()
+    for d in range(daily.shape[1]):
+        acc = alpha * daily[:, d] + (1 - alpha) * acc
+        out[:, d] = acc
+    return out
+
+
+def acwr_series(daily: np.ndarray) -> Dict[str, np.ndarray]:
+    """ Rolling and EWMA acute / chronic loads and their ratios for a (players, days) load matrix. """
+    acute, chronic = rolling_mean(daily, ACUTE_DAYS), rolling_mean(daily, CHRONIC_DAYS)
+    acute_ewma, chronic_ewma = ewma(daily, ACUTE_ALPHA), ewma(daily, CHRONIC_ALPHA)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "acute": acute,
+            "chronic": chronic,
+            "acwr": np.where(chronic > 0, acute / chronic, np.nan),
+            "acute_ewma": acute_ewma,
+            "chronic_ewma": chronic_ewma,
+            "acwr_ewma": np.where(chronic_ewma > 0, acute_ewma / chronic_ewma, np.nan),
+        }
+
+
+def acwr_zone(ratio: Optional[float]) -> Optional[str]:
+    if ratio is None or np.isnan(ratio):
+        return None
+    return next(label for limit, label in ZONES if ratio < limit)
+
+
+class ACWREngine:
+    """
+    Squad Acute:Chronic Workload Ratio, rolling (7 / 28 day) and EWMA.
+    Per player it keeps the last 28 daily loads plus the EWMAs as of the day before the
+    latest session, so a new /log row is folded in O(1) and the whole squad is read in
+    one vectorized pass. A batch rebuild from PlayerHistory seeds the state.
+    """
+
+    def __init__(self):
+        self.players: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.windows = np.zeros((0, CHRONIC_DAYS)) # Daily loads, last column = last_day
+        self.last_days = np.zeros(0, dtype="datetime64[D]")
+        self.first_days = np.zeros(0, dtype="datetime64[D]") # First day with history (EWMA age)
+        # EWMAs up to (not including) last_day
+        self.acute_prev = np.zeros(0)
+        self.chronic_prev = np.zeros(0)
+        self.stale = True # Needs a rebuild (never loaded / back-dated row)
+        self._lock = threading.Lock()
+
+    # === BATCH ===
+    def rebuild(self, player_ids: Sequence[str], days: Sequence[date], loads: Sequence[float], as_of: date):
+        """ Replaces the state from aggregated history rows, vectorized across the squad. """
+        start = min(days, default=as_of)
+        end = max(max(days, default=as_of), as_of)
+        players, daily = daily_load_matrix(player_ids, days, loads, start, end)
+        first = np.full(len(players), (end - start).days)
+        if len(players):
+            _, player_idx = np.unique(np.asarray(player_ids, dtype=str), return_inverse=True)
+            np.minimum.at(first, player_idx, np.array([(d - start).days for d in days], dtype=np.int64))
+
+        # Left-pad with a chronic window of rest days: short histories slice cleanly and
+        # the EWMAs start from 0, exactly like a player first seen through observe()
+        daily = np.pad(daily, ((0, 0), (CHRONIC_DAYS, 0)))
+        acute_ewma, chronic_ewma = ewma(daily, ACUTE_ALPHA), ewma(daily, CHRONIC_ALPHA)
+
+        with self._lock:
+            self.players = players
+            self._index = {p: i for i, p in enumerate(players)}
+            self.windows = daily[:, -CHRONIC_DAYS:].copy()
+            self.last_days = np.full(len(players), np.datetime64(end, "D"))
+            self.first_days = np.datetime64(start, "D") + first
+            self.acute_prev = acute_ewma[:, -2].copy()
+            self.chronic_prev = chronic_ewma[:, -2].copy()
+            self.stale = False
+
+    # === INCREMENTAL ===
+    def _add_player(self, player_id: str, day: date) -> int:
+        self._index[player_id] = len(self.players)
+        self.players.append(player_id)
+        self.windows = np.vstack([self.windows, np.zeros((1, CHRONIC_DAYS))])
+        self.last_days = np.append(self.last_days, np.datetime64(day, "D"))
+        self.first_days = np.append(self.first_days, np.datetime64(day, "D"))
+        self.acute_prev = np.append(self.acute_prev, 0.0)
+        self.chronic_prev = np.append(self.chronic_prev, 0.0)
+        return self._index[player_id]
+
+    def observe(self, player_id: str, day: date, load: float):
+        """ Folds one logged session into the player's state. """
+        with self._lock:
+            i = self._index.get(player_id)
+            if i is None:
+                i = self._add_player(player_id, day)
+            gap = int((np.datetime64(day, "D") - self.last_days[i]).astype(int))
+            if gap < 0:
+                # Back-dated row: every later day would shift, rebuild on next read
+                self.stale = True
+                return
+            if gap > 0:
+                today = self.windows[i, -1]
+                # Close out last_day, then decay through the rest days in between
+                self.acute_prev[i] = (ACUTE_ALPHA * today + (1 - ACUTE_ALPHA) * self.acute_prev[i]) * (1 - ACUTE_ALPHA) ** (gap - 1)
+                self.chronic_prev[i] = (CHRONIC_ALPHA * today + (1 - CHRONIC_ALPHA) * self.chronic_prev[i]) * (1 - CHRONIC_ALPHA) ** (gap - 1)
+                self.windows[i] = np.roll(self.windows[i], -gap) if gap < CHRONIC_DAYS else 0.0
+                self.windows[i, max(CHRONIC_DAYS - gap, 0):] = 0.0
+                self.last_days[i] = np.datetime64(day, "D")
+            self.windows[i, -1] += load
+
+    # === READ ===
+    def squad(self, as_of: date, player_ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """ Current ACWR for every player (or `player_ids`) as of `as_of`, one vectorized pass. """
+        with self._lock:
+            rows = np.arange(len(self.players)) if player_ids is None else \
+                np.array([self._index[p] for p in player_ids if p in self._index], dtype=np.int64)
+            players = [self.players[i] for i in rows]
+            windows = self.windows[rows]
+            last_days = self.last_days[rows]
+            first_days = self.first_days[rows]
+            acute_prev, chronic_prev = self.acute_prev[rows], self.chronic_prev[rows]
+
+        # Days since each player's window ends: older slots fall out, EWMAs decay through rest days
+        gap = np.maximum((np.datetime64(as_of, "D") - last_days).astype(int), 0)
+        history_days = np.maximum((np.datetime64(as_of, "D") - first_days).astype(int) + 1, 0)
+        slot = np.arange(CHRONIC_DAYS)
+        acute = np.where(slot >= CHRONIC_DAYS - ACUTE_DAYS + gap[:, None], windows, 0.0).sum(axis=1) / ACUTE_DAYS
+        chronic = np.where(slot >= gap[:, None], windows, 0.0).sum(axis=1) / CHRONIC_DAYS
+        acute_ewma = (ACUTE_ALPHA * windows[:, -1] + (1 - ACUTE_ALPHA) * acute_prev) * (1 - ACUTE_ALPHA) ** gap
+        chronic_ewma = (CHRONIC_ALPHA * windows[:, -1] + (1 - CHRONIC_ALPHA) * chronic_prev) * (1 - CHRONIC_ALPHA) ** gap
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(chronic > 0, acute / chronic, np.nan)
+            ratio_ewma = np.where(chronic_ewma > 0, acute_ewma / chronic_ewma, np.nan)
+
+        def num(value):
+            return None if np.isnan(value) else round(float(value), 3)
+
+        return [
+            {
+                "player_id": player_id,
+                "acute_7d": num(acute[i]),
+                "chronic_28d": num(chronic[i]),
+                "acwr": num(ratio[i]),
+                "acute_ewma": num(acute_ewma[i]),
+                "chronic_ewma": num(chronic_ewma[i]),
+                "acwr_ewma": num(ratio_ewma[i]),
+                "zone": acwr_zone(ratio_ewma[i]),
+                "history_days": int(history_days[i]),
+            }
+            for i, player_id in enumerate(players)
+        ]
@@ -1,54 +1,256 @@
+import os
+import warnings
+import threading
 import numpy as np
-from typing import List, Dict, Any
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Any, Optional, Sequence
+
+# Column order of every history row / metric axis
+METRICS = ("load", "hrv", "sleep")
+LOAD, HRV, SLEEP = range(len(METRICS))
+
+# Rolling baseline: each day is scored against the previous WINDOW days only,
+# so an early high-volume block doesn't hide later spikes
+WINDOW = 28
+MIN_PERIODS = 5
+Z_THRESHOLD = 2.5
+
+# 1.4826 * MAD estimates the std of normal data; 1.2533 * mean abs deviation is the fallback
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+# Scale floor, so a spike over a flat (or near-flat) baseline still scores:
+# 5% of the baseline median, and never below a per-metric minimum [load, hrv, sleep]
+MIN_SCALE_FRACTION = 0.05
+MIN_SCALE = np.array([1.0, 1.0, 0.1])
+
+
+def stack_histories(histories: Sequence[Sequence[Sequence[float]]], metrics: int = len(METRICS)) -> np.ndarray:
+    """
+    Packs per-player [load, hrv, sleep] histories into one (players, days, metrics) array.
+    Shorter histories are NaN-padded at the front, so the last day lines up for everyone.
+    """
+    days = max((len(h) for h in histories), default=0)
+    data = np.full((len(histories), days, metrics), np.nan)
+    for i, history in enumerate(histories):
+        if len(history):
+            data[i, days - len(history):] = np.asarray(history, dtype=np.float64)[:, :metrics]
+    return data
+
+
+def _window_z(values: np.ndarray, windows: np.ndarray, min_periods: int) -> np.ndarray:
+    """
+    Robust z-score of `values` (..., metrics) against `windows` (..., metrics, window).
+    NaN where the window holds fewer than `min_periods` observations. The scale is floored
+    (MIN_SCALE_FRACTION of the median, MIN_SCALE), so a flat baseline still flags a spike.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning) # All-NaN windows
+        counts = np.sum(~np.isnan(windows), axis=-1)
+        median = np.nanmedian(windows, axis=-1)
+        deviation = np.abs(windows - median[..., np.newaxis])
+        scale = MAD_SCALE * np.nanmedian(deviation, axis=-1)
+        # MAD is 0 when over half the window is identical; fall back to the mean abs deviation
+        scale = np.where(scale > 0, scale, MEAN_AD_SCALE * np.nanmean(deviation, axis=-1))
+    floor = np.maximum(MIN_SCALE_FRACTION * np.abs(median), MIN_SCALE[:np.shape(median)[-1]])
+    scale = np.fmax(scale, floor) # fmax: all-NaN windows keep the floor, masked by `valid` anyway
+
+    valid = counts >= min_periods
+    z = np.full(np.shape(values), np.nan)
+    np.divide(values - median, scale, out=z, where=valid)
+    return z
+
+
+def rolling_robust_z(data: np.ndarray, window: int = WINDOW, min_periods: int = MIN_PERIODS) -> np.ndarray:
+    """
+    Robust z-score of every day against the trailing `window` days (excluding the day itself):
+    (x - median) / (1.4826 * MAD), for all players and metrics at once.
+    data: (days, metrics) or (players, days, metrics); NaN marks a missing day.
+    Days with fewer than `min_periods` prior observations (a player's first days) are
+    scored against the days around them instead (up to `window` either side, excluding
+    the day itself), so short histories still get checked.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    squeeze = data.ndim == 2
+    if squeeze:
+        data = data[np.newaxis]
+    players, days, metrics = data.shape
+
+    # Front-pad with NaN so day d sees exactly days [d - window, d)
+    padded = np.concatenate([np.full((players, window, metrics), np.nan), data], axis=1)
+    windows = sliding_window_view(padded, window, axis=1)[:, :days] # (players, days, metrics, window)
+
+    z = _window_z(data, windows, min_periods)
+
+    # Warm-up days: two-sided baseline, gathered only for the (player, day) pairs that need it
+    short = np.sum(~np.isnan(windows), axis=-1) < min_periods # (players, days, metrics)
+    p, d = np.nonzero(short.any(axis=-1) & ~np.isnan(data).all(axis=-1))
+    if len(p):
+        both = np.concatenate([padded, np.full((players, window, metrics), np.nan)], axis=1)
+        around = sliding_window_view(both, 2 * window + 1, axis=1)[p, d] # (n, metrics, 2 * window + 1)
+        around[..., window] = np.nan # The day itself
+        warm = _window_z(data[p, d], around, min_periods)
+        z[p, d] = np.where(short[p, d], warm, z[p, d])
+    return z[0] if squeeze else z
+
 
 class AnomalyService:
-    def __init__(self):
-        pass
+    def __init__(self, window: int = WINDOW, threshold: float = Z_THRESHOLD, min_periods: int = MIN_PERIODS):
+        self.window = window
+        self.threshold = threshold
+        self.min_periods = min_periods
+
+    def detect_masks(self, data: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized scan. data: (days, metrics) or (players, days, metrics), one call for a whole squad.
+        Returns the robust z-scores plus one boolean mask per anomaly type, each shaped like data[..., 0].
+        """
+        z = rolling_robust_z(data, self.window, self.min_periods)
+        with np.errstate(invalid="ignore"):
+            high = z > self.threshold
+            low = z < -self.threshold
+        return {
+            "z": z,
+            "any": high.any(axis=-1) | low.any(axis=-1),
+            "load_spike": high[..., LOAD],
+            "undertraining": low[..., LOAD],
+            "hrv_crash": low[..., HRV],
+            "sleep_deficit": low[..., SLEEP],
+        }
+
+    def detect_squad(self, histories: Sequence[Sequence[Sequence[float]]]) -> Dict[str, np.ndarray]:
+        """ detect_masks over ragged per-player histories (aligned on the most recent day). """
+        return self.detect_masks(stack_histories(histories))
 
     def detect_anomalies(self, history: List[List[float]]) -> Dict[str, Any]:
         """
-        Scans history for Z-score anomalies and generates specific coaching advice.
+        Scans history for rolling robust z-score anomalies and generates specific coaching advice.
         """
         if not history or len(history) < 5:
             return {"detected": False, "anomalies": [], "advice": []}
 
-        # Extract Metrics
-        loads = np.array([day[0] for day in history])
-        hrvs = np.array([day[1] for day in history])
-        sleeps = np.array([day[2] for day in history])
+        data = np.asarray(history, dtype=np.float64)[:, :len(METRICS)]
+        masks = self.detect_masks(data)
 
-        # Z-Score Detection Helper
-        def get_outliers(data):
-            if np.std(data) == 0: return []
-            z_scores = (data - np.mean(data)) / np.std(data)
-            return np.where(np.abs(z_scores) > 1.5)[0].tolist()
-
-        load_idx = get_outliers(loads)
-        hrv_idx = get_outliers(hrvs)
-        
         anomalies = []
         coach_advice = []
 
-        # Process Load Spikes
-        for idx in load_idx:
-            val = loads[idx]
-            avg = np.mean(loads)
-            if val > avg:
+        # Process Load Spikes / Undertraining
+        for idx in np.flatnonzero(masks["load_spike"] | masks["undertraining"]):
+            val = float(data[idx, LOAD])
+            if masks["load_spike"][idx]:
                 anomalies.append({"day": int(idx), "type": "Acute Load Spike", "val": val})
                 coach_advice.append(f"Day {idx+1}: Acute Load Spike detected. Reduce session intensity by 20% to normalize.")
-            elif val < avg:
+            else:
                 anomalies.append({"day": int(idx), "type": "Undertraining", "val": val})
 
         # Process HRV Crashes
-        for idx in hrv_idx:
-            val = hrvs[idx]
-            avg = np.mean(hrvs)
-            if val < avg:
-                anomalies.append({"day": int(idx), "type": "HRV Crash", "val": val})
-                coach_advice.append(f"Day {idx+1}: Significant HRV Drop. Prioritize sleep and active recovery immediately.")
+        for idx in np.flatnonzero(masks["hrv_crash"]):
+            anomalies.append({"day": int(idx), "type": "HRV Crash", "val": float(data[idx, HRV])})
+            coach_advice.append(f"Day {idx+1}: Significant HRV Drop. Prioritize sleep and active recovery immediately.")
 
         return {
             "detected": len(anomalies) > 0,
             "anomalies": anomalies,
-            "advice": list(set(coach_advice)) # Remove duplicates
-        }
\ No newline at end of file
+            "advice": list(dict.fromkeys(coach_advice)) # Remove duplicates, keep day order
+        }
+
+
+class StreamingAnomalyDetector:
+    """
+    Incremental AnomalyService for the write path.
+    Keeps a ring buffer of each player's last `window` rows, so scoring a new log is
+    O(window) regardless of history length and gives the same robust z-score as the
+    batch scan, scale floor included. Only a player's first `min_periods` rows differ,
+    as there are no later days to score them against yet. Buffers (plus the last
+    PlayerHistory id applied per player) are snapshotted to disk so a restart only
+    replays rows logged after the snapshot.
+    """
+
+    TYPES = (
+        # (metric, direction, label)
+        (LOAD, 1, "Acute Load Spike"),
+        (LOAD, -1, "Undertraining"),
+        (HRV, -1, "HRV Crash"),
+        (SLEEP, -1, "Sleep Deficit"),
+    )
+
+    def __init__(self, window: int = WINDOW, threshold: float = Z_THRESHOLD, min_periods: int = MIN_PERIODS):
+        self.window = window
+        self.threshold = threshold
+        self.min_periods = min_periods
+
+        # player_id -> (window, metrics) ring (NaN = empty slot), next write slot, last row id
+        self.buffers: Dict[str, np.ndarray] = {}
+        self.positions: Dict[str, int] = {}
+        self.last_ids: Dict[str, int] = {}
+        self.updates = 0
+        self._lock = threading.Lock()
+
+    def last_id(self, player_id: str) -> Optional[int]:
+        with self._lock:
+            return self.last_ids.get(player_id)
+
+    def update(self, player_id: str, row: Sequence[float], row_id: Optional[int] = None) -> Dict[str, Any]:
+        """ Scores `row` [load, hrv, sleep] against the player's window, then pushes it in. """
+        values = np.array(row, dtype=np.float64)[:len(METRICS)]
+        with self._lock:
+            buffer = self.buffers.get(player_id)
+            if buffer is None:
+                buffer = self.buffers[player_id] = np.full((self.window, len(METRICS)), np.nan)
+                self.positions[player_id] = 0
+            z = _window_z(values, buffer.T, self.min_periods)
+
+            # Rows already applied (replays, other API workers) are scored but not pushed twice
+            if row_id is None or row_id > self.last_ids.get(player_id, -1):
+                position = self.positions[player_id]
+                buffer[position] = values
+                self.positions[player_id] = (position + 1) % self.window
+                if row_id is not None:
+                    self.last_ids[player_id] = row_id
+                self.updates += 1
+        return self.verdict(z)
+
+    def verdict(self, z: np.ndarray) -> Dict[str, Any]:
+        types = [label for metric, direction, label in self.TYPES if direction * z[metric] > self.threshold]
+        return {
+            "detected": len(types) > 0,
+            "types": types,
+            "z": {name: (None if np.isnan(value) else round(float(value), 2)) for name, value in zip(METRICS, z)},
+        }
+
+    # === SNAPSHOTS ===
+    def save(self, path: str):
+        with self._lock:
+            players = list(self.buffers)
+            state = {
+                "window": np.array(self.window),
+                "players": np.array(players, dtype=str),
+                "buffers": np.stack([self.buffers[p] for p in players]) if players else np.zeros((0, self.window, len(METRICS))),
+                "positions": np.array([self.positions[p] for p in players], dtype=np.int64),
+                "last_ids": np.array([self.last_ids.get(p, -1) for p in players], dtype=np.int64),
+            }
+        # Write-then-rename (per process) so a reader never sees a partial snapshot
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **state)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """ Restores a snapshot; False (and an empty state) if missing or built for another window. """
+        try:
+            with np.load(path) as snapshot:
+                if int(snapshot["window"]) != self.window:
+                    return False
+                players = snapshot["players"].tolist()
+                buffers, positions, last_ids = snapshot["buffers"], snapshot["positions"], snapshot["last_ids"]
+        except (FileNotFoundError, ValueError, OSError, KeyError):
+            return False
+
+        with self._lock:
+            for i, player_id in enumerate(players):
+                self.buffers[player_id] = buffers[i].copy()
+                self.positions[player_id] = int(positions[i])
+                if last_ids[i] >= 0:
+                    self.last_ids[player_id] = int(last_ids[i])
+        return True
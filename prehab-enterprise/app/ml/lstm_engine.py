@@ -1,9 +1,17 @@
+import copy
+import json
+import time
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from torch.utils.data import DataLoader, TensorDataset
 from sklearn.preprocessing import MinMaxScaler
-from typing import List
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Union
+
+# Fitted MinMaxScaler attributes we need to round-trip a player's scaler
+SCALER_ATTRS = ("min_", "scale_", "data_min_", "data_max_", "data_range_")
 
 # === THE NEURAL NETWORK ===
 class SportsGRU(nn.Module):
@@ -35,86 +43,349 @@ class SportsGRU(nn.Module):
         out = self.fc(out[:, -1, :])
         return out
 
+# === STACKED (PER-PLAYER WEIGHTS) FORWARD ===
+def stack_model_weights(models: List[SportsGRU]) -> Dict[str, torch.Tensor]:
+    """ Stacks N SportsGRU state dicts along a leading player axis. """
+    states = [m.state_dict() for m in models]
+    return {name: torch.stack([st[name] for st in states]) for name in states[0]}
+
+def _stacked_gru_direction(x, w_ih, w_hh, b_ih, b_hh, reverse=False):
+    """ One GRU direction where every sample has its own weights. x: (N, T, F) -> (N, T, H) """
+    n, steps, _ = x.shape
+    hidden = w_hh.size(2)
+    # Input projections for all timesteps at once: (N, T, 3H)
+    gates_x = torch.bmm(x, w_ih.transpose(1, 2)) + b_ih.unsqueeze(1)
+    w_hh_t = w_hh.transpose(1, 2)
+
+    h = x.new_zeros(n, hidden)
+    outputs = [None] * steps
+    for t in (range(steps - 1, -1, -1) if reverse else range(steps)):
+        gates_h = torch.bmm(h.unsqueeze(1), w_hh_t).squeeze(1) + b_hh
+        xr, xz, xn = gates_x[:, t].chunk(3, dim=1)
+        hr, hz, hn = gates_h.chunk(3, dim=1)
+        r = torch.sigmoid(xr + hr)
+        z = torch.sigmoid(xz + hz)
+        cand = torch.tanh(xn + r * hn)
+        h = (1 - z) * cand + z * h
+        outputs[t] = h
+    return torch.stack(outputs, dim=1)
+
+def stacked_gru_forward(weights: Dict[str, torch.Tensor], x: torch.Tensor, num_layers: int = 2) -> torch.Tensor:
+    """
+    Eval-mode SportsGRU.forward for N players in one call, each with their own weights.
+    Mirrors nn.GRU's (r, z, n) gate layout so results match the per-player model.
+    """
+    out = x
+    for layer in range(num_layers):
+        directions = []
+        for suffix, reverse in (("", False), ("_reverse", True)):
+            directions.append(_stacked_gru_direction(
+                out,
+                weights[f"gru.weight_ih_l{layer}{suffix}"],
+                weights[f"gru.weight_hh_l{layer}{suffix}"],
+                weights[f"gru.bias_ih_l{layer}{suffix}"],
+                weights[f"gru.bias_hh_l{layer}{suffix}"],
+                reverse=reverse,
+            ))
+        out = torch.cat(directions, dim=2)
+
+    last = out[:, -1, :]
+    return torch.bmm(weights["fc.weight"], last.unsqueeze(2)).squeeze(2) + weights["fc.bias"]
+
+# === STREAMING SEQUENCES ===
+def stream_sequence_batches(
+    source: Union[str, np.ndarray],
+    seq_length: int = 7,
+    batch_size: int = 256,
+    scaler: Optional[MinMaxScaler] = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields (X, y) mini-batches of training windows straight from a history array.
+    `source` can be a .npy path, opened memory-mapped, so multi-season histories
+    are paged in batch by batch instead of being loaded (or windowed) up front.
+    Only the batch being yielded is materialized when a scaler is applied.
+    """
+    data = np.load(source, mmap_mode="r") if isinstance(source, str) else source
+    if len(data) <= seq_length:
+        return
+
+    X = sliding_window_view(data[:-1], seq_length, axis=0).transpose(0, 2, 1)
+    y = data[seq_length:, 0]
+    for start in range(0, len(y), batch_size):
+        X_batch, y_batch = X[start:start + batch_size], y[start:start + batch_size]
+        if scaler is not None:
+            X_batch = X_batch * scaler.scale_ + scaler.min_
+            y_batch = y_batch * scaler.scale_[0] + scaler.min_[0]
+        yield X_batch, y_batch
+
+# === AUTOREGRESSIVE ROLLOUT ===
+def autoregressive_rollout(step, window: torch.Tensor, held: torch.Tensor, horizon: int) -> torch.Tensor:
+    """
+    Rolls a one-step forecaster `horizon` days forward.
+    window: (N, W, 3) scaled inputs, held: (N, 2) HRV/Sleep kept constant.
+    Returns the (N, horizon) predicted load track.
+
+    The whole track lives in one preallocated (N, W + horizon, 3) buffer: each
+    step reads its window as a view and writes a single prediction, so nothing
+    is rebuilt, concatenated or synced to Python until the caller is done.
+    The window is re-encoded every step on purpose - the GRU is bidirectional,
+    so a carried hidden state would not match the model's own predictions.
+    """
+    n, w, _ = window.shape
+    with torch.inference_mode():
+        buffer = window.new_empty(n, w + horizon, window.size(2))
+        buffer[:, :w] = window
+        buffer[:, w:, 1:] = held.unsqueeze(1)
+
+        for t in range(horizon):
+            buffer[:, w + t, 0] = step(buffer[:, t:t + w]).squeeze(1)
+
+    return buffer[:, w:, 0]
+
 # === THE ENGINE (TRAINING & PREDICTION) ===
 class PredictiveService:
-    def __init__(self):
-        self.model = SportsGRU()
+    def __init__(self, model: Optional[nn.Module] = None, inference_only: bool = False):
+        self.model = model if model is not None else SportsGRU()
         self.scaler = MinMaxScaler()
-        self.criterion = nn.MSELoss()
-        self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
+        self.inference_only = inference_only
         self.is_fitted = False
+        self.quantized = False
+        self.quantization_drift = None
+
+        if inference_only:
+            # Serving only: no optimizer, no parameter gradients
+            self.model.eval()
+            self.model.requires_grad_(False)
+        else:
+            self.criterion = nn.MSELoss()
+            self.optimizer = optim.Adam(self.model.parameters(), lr=0.001)
         
         # Initialize with dummy data to define scaler bounds
         dummy_data = np.array([[0, 0, 0], [1000, 150, 12]]) 
         self.scaler.fit(dummy_data)
 
-    def create_sequences(self, data: np.ndarray, seq_length: int):
-        xs, ys = [], []
+    # === EXPORT (TorchScript) ===
+    def export(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Serializes the model as a TorchScript graph with the fitted scaler (and any
+        extra metadata) embedded, ready for load_exported() in inference workers.
+        """
+        self.model.eval()
+        scripted = torch.jit.script(self.model)
+        state = {k: v for k, v in self.get_state().items() if k != "model"}
+        state.update(metadata or {})
+        torch.jit.save(scripted, path, _extra_files={"state.json": json.dumps(state)})
+
+    @classmethod
+    def load_exported(cls, path: str) -> Tuple["PredictiveService", Dict[str, Any]]:
+        """ Inference-only service from an exported graph. Returns (service, metadata). """
+        extra_files = {"state.json": ""}
+        scripted = torch.jit.load(path, map_location="cpu", _extra_files=extra_files)
+        state = json.loads(extra_files["state.json"])
+
+        service = cls(model=scripted, inference_only=True)
+        service._load_scaler(state)
+        return service, state
+
+    # === QUANTIZED CPU INFERENCE ===
+    def quantize(self, holdout_history: List[List[float]], tolerance: float = 2.0) -> bool:
+        """
+        Opt-in dynamic int8 quantization of the GRU and Linear layers.
+        The accuracy guard forecasts `holdout_history` with both models and keeps
+        the float model if any day drifts more than `tolerance` risk points.
+        """
+        if self.quantized:
+            return True
+        if isinstance(self.model, torch.jit.ScriptModule):
+            print("⚠️ Quantization needs the eager model (load the .pt checkpoint, not the export)")
+            return False
+        if len(holdout_history) < 7:
+            return False
+
+        float_model = self.model
+        float_curve = np.array(self.predict_next_15_days(holdout_history))
+
+        self.model = torch.ao.quantization.quantize_dynamic(
+            float_model, {nn.GRU, nn.Linear}, dtype=torch.qint8
+        )
+        quant_curve = np.array(self.predict_next_15_days(holdout_history))
+        self.quantization_drift = float(np.max(np.abs(float_curve - quant_curve)))
+
+        if self.quantization_drift > tolerance:
+            print(f"⚠️ Int8 drift {self.quantization_drift:.2f} > {tolerance}, keeping float model")
+            self.model = float_model
+            return False
+
+        self.quantized = True
+        return True
+
+    def create_sequences(self, data, seq_length: int):
+        """
+        X[i] = data[i:i+seq_length], y[i] = data[i+seq_length, 0].
+        Both are strided views over `data` (ndarray or tensor), nothing is copied.
+        """
         if len(data) <= seq_length: return None, None
-        for i in range(len(data) - seq_length):
-            x = data[i:(i + seq_length)]
-            y = data[i + seq_length][0] 
-            xs.append(x)
-            ys.append(y)
-        return np.array(xs), np.array(ys)
-
-    def train_on_history(self, raw_history: List[List[float]]):
-        """ Live Training: Retrains the model instantly when user uploads CSV. """
+        if isinstance(data, torch.Tensor):
+            X = data[:-1].unfold(0, seq_length, 1).transpose(1, 2)
+        else:
+            X = sliding_window_view(data[:-1], seq_length, axis=0).transpose(0, 2, 1)
+        y = data[seq_length:, 0]
+        return X, y
+
+    def get_state(self) -> Dict[str, Any]:
+        """ Snapshot of weights + fitted scaler (plain types so torch.load stays weights_only safe). """
+        return {
+            "model": self.model.state_dict(),
+            "scaler": {attr: getattr(self.scaler, attr).tolist() for attr in SCALER_ATTRS},
+            "n_samples_seen": int(self.scaler.n_samples_seen_),
+            "is_fitted": self.is_fitted,
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """ Restores a snapshot produced by get_state(). """
+        self.model.load_state_dict(state["model"])
+        self._load_scaler(state)
+
+    def _load_scaler(self, state: Dict[str, Any]):
+        for attr in SCALER_ATTRS:
+            setattr(self.scaler, attr, np.array(state["scaler"][attr], dtype=np.float64))
+        self.scaler.n_samples_seen_ = state["n_samples_seen"]
+        self.is_fitted = state["is_fitted"]
+
+    def train_on_history(
+        self,
+        raw_history: List[List[float]],
+        max_epochs: int = 50,
+        batch_size: int = 32,
+        patience: int = 5,
+        val_fraction: float = 0.2,
+        time_budget: Optional[float] = None,
+    ):
+        """
+        Live Training: mini-batched, stops early once validation loss stalls
+        or the wall-clock budget (seconds) runs out. Training continues from the
+        current weights, so a warm-started model only needs a few epochs.
+        """
+        if self.inference_only or self.quantized:
+            raise RuntimeError("Inference-only PredictiveService cannot be trained")
         if len(raw_history) < 14: return False
             
         data_scaled = self.scaler.fit_transform(np.array(raw_history))
-        X, y = self.create_sequences(data_scaled, seq_length=7)
+        series = torch.from_numpy(data_scaled.astype(np.float32))
+        X_all, y_all = self.create_sequences(series, seq_length=7)
         
-        if X is None: return False
+        if X_all is None: return False
+        y_all = y_all.unsqueeze(1)
 
-        X_train = torch.tensor(X, dtype=torch.float32)
-        y_train = torch.tensor(y, dtype=torch.float32).view(-1, 1)
-        
-        self.model.train()
-        epochs = 50 
-        
-        for epoch in range(epochs):
-            self.optimizer.zero_grad()
-            outputs = self.model(X_train)
-            loss = self.criterion(outputs, y_train)
-            loss.backward()
-            self.optimizer.step()
+        # Chronological split: validate on the most recent windows
+        n_val = int(len(X_all) * val_fraction) if len(X_all) >= 10 else 0
+        n_train = len(X_all) - n_val
+        loader = DataLoader(
+            TensorDataset(X_all[:n_train], y_all[:n_train]),
+            batch_size=batch_size,
+            shuffle=True,
+        )
+        X_val, y_val = (X_all[n_train:], y_all[n_train:]) if n_val else (X_all, y_all)
+
+        best_loss = float("inf")
+        best_state = None
+        stale_epochs = 0
+        started = time.monotonic()
+
+        for epoch in range(max_epochs):
+            self.model.train()
+            for X_batch, y_batch in loader:
+                self.optimizer.zero_grad()
+                loss = self.criterion(self.model(X_batch), y_batch)
+                loss.backward()
+                self.optimizer.step()
+
+            self.model.eval()
+            with torch.no_grad():
+                val_loss = self.criterion(self.model(X_val), y_val).item()
+
+            if val_loss < best_loss:
+                best_loss = val_loss
+                best_state = copy.deepcopy(self.model.state_dict())
+                stale_epochs = 0
+            else:
+                stale_epochs += 1
+
+            if stale_epochs >= patience:
+                break
+            if time_budget is not None and time.monotonic() - started > time_budget:
+                break
+
+        if best_state is not None:
+            self.model.load_state_dict(best_state)
             
         self.is_fitted = True
         return True
 
-    def predict_next_15_days(self, recent_history: List[List[float]]):
+    def predict_next_15_days(self, recent_history: List[List[float]], horizon: int = 15):
         """
         Forecasts the next 15 days (2 Weeks).
         """
         # If not enough data, return a flatline (50% risk)
-        if len(recent_history) < 7: return [50] * 15
+        if len(recent_history) < 7: return [50] * horizon
             
         # Scale Input
         input_seq = np.array(recent_history[-7:]) # Take last 7 days
         input_scaled = self.scaler.transform(input_seq)
         
-        # Convert to Tensor
-        current_seq = torch.tensor(input_scaled, dtype=torch.float32).unsqueeze(0)
-        
-        predictions = []
+        # We assume HRV/Sleep stay consistent for the forecast horizon
+        held = torch.tensor(input_seq[:, 1:].mean(axis=0), dtype=torch.float32).unsqueeze(0)
+        window = torch.tensor(input_scaled, dtype=torch.float32).unsqueeze(0)
+
         self.model.eval()
-        
-        with torch.no_grad():
-            for _ in range(15):
-                # Predict
-                pred_val = self.model(current_seq)
-                predictions.append(pred_val.item())
-                
-                # Autoregressive Update:
-                # We assume HRV/Sleep stay consistent for the forecast horizon
-                avg_hrv = input_seq[:, 1].mean()
-                avg_sleep = input_seq[:, 2].mean()
-                
-                new_step = torch.tensor([[pred_val.item(), avg_hrv, avg_sleep]], dtype=torch.float32)
-                current_seq = torch.cat((current_seq[:, 1:, :], new_step.unsqueeze(0)), dim=1)
+        predictions = autoregressive_rollout(self.model, window, held, horizon)
         
         # Inverse Scale to 0-100 Risk Score
-        risk_scores = [max(0, min(100, p * 100)) for p in predictions]
-        
-        return risk_scores
\ No newline at end of file
+        return (predictions[0] * 100).clamp(0, 100).tolist()
+
+    def predict_batch(self, histories: List[List[List[float]]], horizon: int = 15) -> List[List[float]]:
+        """ predict_next_15_days for many histories served by this same model. """
+        return forecast_squad([self] * len(histories), histories, horizon)
+
+
+# === SQUAD FORECASTING ===
+def forecast_squad(services: List[PredictiveService], histories: List[List[List[float]]], horizon: int = 15) -> List[List[float]]:
+    """
+    Batched predict_next_15_days for a whole squad.
+    Every player's last-7-day window goes into one (N, 7, 3) tensor and the
+    autoregressive horizon is rolled forward for all of them at once. Players
+    with their own registry model are served through stacked per-player weights.
+    """
+    results = [[50] * horizon for _ in histories]
+    ready = [i for i, h in enumerate(histories) if len(h) >= 7]
+    if not ready:
+        return results
+
+    windows = np.array([histories[i][-7:] for i in ready], dtype=np.float64)  # (N, 7, 3)
+    mins = np.stack([services[i].scaler.min_ for i in ready])
+    scales = np.stack([services[i].scaler.scale_ for i in ready])
+    windows_scaled = windows * scales[:, None, :] + mins[:, None, :]
+
+    # Same convention as predict_next_15_days: HRV/Sleep held at the window average
+    held = torch.tensor(windows[:, :, 1:].mean(axis=1), dtype=torch.float32)  # (N, 2)
+
+    window = torch.tensor(windows_scaled, dtype=torch.float32)
+    models = [services[i].model for i in ready]
+    if all(m is models[0] for m in models):
+        models[0].eval()
+        preds = autoregressive_rollout(models[0], window, held, horizon)
+    elif any(services[i].quantized for i in ready):
+        # Packed int8 weights can't be stacked: roll each player's model on its own row
+        preds = torch.cat([
+            autoregressive_rollout(m, window[j:j + 1], held[j:j + 1], horizon)
+            for j, m in enumerate(models)
+        ])
+    else:
+        weights = stack_model_weights(models)
+        step = lambda seq: stacked_gru_forward(weights, seq, models[0].num_layers)
+        preds = autoregressive_rollout(step, window, held, horizon)
+
+    risk = (preds * 100).clamp(0, 100).tolist()
+    for row, i in zip(risk, ready):
+        results[i] = row
+    return results
\ No newline at end of file
@@ -0,0 +1,180 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+from app.ml.lstm_engine import PredictiveService
+
+# Same threshold the old inline retrain used (> 14 days of history)
+MIN_TRAINING_DAYS = 15
+HOLDOUT_DAYS = 30
+
+
+class ModelRegistry:
+    """
+    Per-player GRU store.
+    Every player gets their own PredictiveService (weights + fitted scaler), held in an
+    in-memory LRU and persisted to disk, so a request only pays for a forward pass
+    unless that player's history actually changed.
+    """
+
+    def __init__(
+        self,
+        store_dir: Optional[str] = None,
+        capacity: Optional[int] = None,
+        inference_only: bool = False,
+        quantize: bool = False,
+    ):
+        self.store_dir = store_dir or settings.MODEL_STORE_DIR
+        self.capacity = capacity or settings.MODEL_CACHE_SIZE
+        # Inference-only registries serve the exported TorchScript graphs (API workers);
+        # training registries keep full checkpoints for warm starts (app.worker)
+        self.inference_only = inference_only
+        # Int8 serving quantizes the eager checkpoint (TorchScript exports can't be re-quantized)
+        self.quantize = inference_only and quantize
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        # player_id -> (service, history fingerprint, file mtime)
+        self._cache: "OrderedDict[str, Tuple[PredictiveService, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._player_locks = {}
+
+        # Untrained fallback for players without enough history
+        self.base = PredictiveService(inference_only=inference_only)
+
+    # === KEYS & PATHS ===
+    @staticmethod
+    def fingerprint(history: List[List[float]]) -> str:
+        """ Content hash of a [load, hrv, sleep] history matrix. """
+        data = np.ascontiguousarray(np.array(history, dtype=np.float64))
+        return hashlib.sha1(data.tobytes()).hexdigest()
+
+    def _path(self, player_id: str, exported: Optional[bool] = None) -> str:
+        if exported is None:
+            exported = self.inference_only and not self.quantize
+        safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", str(player_id))
+        return os.path.join(self.store_dir, f"gru_{safe_id}.{'ts' if exported else 'pt'}")
+
+    def _player_lock(self, player_id: str) -> threading.Lock:
+        with self._lock:
+            return self._player_locks.setdefault(player_id, threading.Lock())
+
+    # === CACHE ===
+    def _remember(self, player_id: str, service: PredictiveService, fp: str, mtime: float):
+        with self._lock:
+            self._cache[player_id] = (service, fp, mtime)
+            self._cache.move_to_end(player_id)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)  # Evict least recently used (still on disk)
+
+    def _lookup(self, player_id: str) -> Optional[Tuple[PredictiveService, str]]:
+        path = self._path(player_id)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        with self._lock:
+            entry = self._cache.get(player_id)
+            # Serve from memory unless the worker has since published newer weights
+            if entry is not None and (mtime is None or entry[2] >= mtime):
+                self._cache.move_to_end(player_id)
+                return entry[0], entry[1]
+
+        if mtime is None:
+            return None
+
+        try:
+            if self.quantize:
+                state = torch.load(path, map_location="cpu")
+                service = PredictiveService(inference_only=True)
+                service.load_state(state)
+                service.quantize(state.get("holdout", []), settings.GRU_QUANTIZE_TOLERANCE)
+            elif self.inference_only:
+                service, state = PredictiveService.load_exported(path)
+            else:
+                state = torch.load(path, map_location="cpu")
+                service = PredictiveService()
+                service.load_state(state)
+        except Exception as e:
+            print(f"⚠️ Could not load GRU for {player_id}: {e}")
+            return (entry[0], entry[1]) if entry else None
+
+        self._remember(player_id, service, state["fingerprint"], mtime)
+        return service, state["fingerprint"]
+
+    # === PERSISTENCE ===
+    def save(self, player_id: str, service: PredictiveService, fp: str, holdout: Optional[List[List[float]]] = None):
+        # Write-then-rename so readers never see a half written file
+        if not service.inference_only:
+            state = service.get_state()
+            state["fingerprint"] = fp
+            # Recent days kept for the int8 accuracy guard
+            state["holdout"] = holdout or []
+            ckpt_path = self._path(player_id, exported=False)
+            torch.save(state, f"{ckpt_path}.tmp")
+            os.replace(f"{ckpt_path}.tmp", ckpt_path)
+
+        export_path = self._path(player_id, exported=True)
+        service.export(f"{export_path}.tmp", metadata={"fingerprint": fp})
+        os.replace(f"{export_path}.tmp", export_path)
+
+        path = self._path(player_id)
+        self._remember(player_id, service, fp, os.stat(path).st_mtime)
+
+    # === PUBLIC API ===
+    def get_service(self, player_id: str) -> PredictiveService:
+        """ Player's trained model if we have one, otherwise the untrained base. """
+        entry = self._lookup(player_id)
+        return entry[0] if entry else self.base
+
+    def stale_fingerprint(self, player_id: str, history: List[List[float]]) -> Optional[str]:
+        """ Fingerprint of `history` if the player's model needs (re)training, else None. """
+        if len(history) < MIN_TRAINING_DAYS:
+            return None
+        fp = self.fingerprint(history)
+        entry = self._lookup(player_id)
+        return None if entry and entry[1] == fp else fp
+
+    def train(self, player_id: str, history: List[List[float]], fp: Optional[str] = None) -> bool:
+        """
+        Trains a new PredictiveService for the player and publishes it.
+        The copy is trained off to the side, so a retrain never touches the
+        weights another request is predicting with.
+        """
+        fp = fp or self.fingerprint(history)
+        with self._player_lock(player_id):
+            service = PredictiveService()
+
+            # Warm start from the player's previous weights: incremental retrains
+            # then converge (and early-stop) in a handful of epochs
+            previous = self._lookup(player_id)
+            if previous:
+                service.load_state(previous[0].get_state())
+
+            trained = service.train_on_history(
+                history,
+                max_epochs=settings.GRU_MAX_EPOCHS,
+                batch_size=settings.GRU_BATCH_SIZE,
+                patience=settings.GRU_PATIENCE,
+                time_budget=settings.GRU_TRAIN_BUDGET_SECONDS,
+            )
+            if not trained:
+                return False
+            # Plain floats: histories may be NumPy views, and np.float64 scalars fail torch.load(weights_only=True)
+            holdout = np.asarray(history[-HOLDOUT_DAYS:], dtype=np.float64).tolist()
+            self.save(player_id, service, fp, holdout=holdout)
+            return True
+
+    def get_or_train(self, player_id: str, history: List[List[float]]) -> PredictiveService:
+        """ Synchronous variant: retrains inline when the history changed (scripts / worker). """
+        fp = self.stale_fingerprint(player_id, history)
+        if fp:
+            self.train(player_id, history, fp)
+        return self.get_service(player_id)
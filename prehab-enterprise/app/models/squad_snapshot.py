@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class SquadSnapshot(Base):
+    """ One uploaded squad file: precomputed Squad Manager KPIs + chart series (immutable). """
+    __tablename__ = "squad_snapshots"
+    __table_args__ = (UniqueConstraint("squad", "version", name="uq_squad_snapshot_version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    squad = Column(String, nullable=False, default="default", index=True)
+    version = Column(Integer, nullable=False) # 1, 2, ... per squad
+    filename = Column(String, nullable=True)
+    content_hash = Column(String(64), index=True) # sha256 of the uploaded file
+    row_count = Column(Integer, default=0)
+    # Serialized {"kpis", "charts"} payload, served as-is (Text for SQLite compatibility)
+    report = Column(Text, nullable=False)
+    etag = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Any
 
 # ==========================================
@@ -53,6 +53,29 @@ class AnalysisInput(BaseModel):
     # Optional Log Entry
     log_entry: Optional[LogEntryInput] = None 
 
+class PlayerForecastInput(BaseModel):
+    player_id: str
+    # [[load, hrv, sleep], ...] - if omitted, the last 7 days are read from player_history
+    history: Optional[List[List[float]]] = None
+
+# Longest rollout /forecast/batch will run (days)
+MAX_FORECAST_HORIZON = 60
+
+class SquadForecastInput(BaseModel):
+    players: List[PlayerForecastInput]
+    horizon: int = Field(15, ge=1, le=MAX_FORECAST_HORIZON)
+
+    @field_validator("players")
+    @classmethod
+    def unique_player_ids(cls, players: List[PlayerForecastInput]) -> List[PlayerForecastInput]:
+        # One curve per player: duplicates would silently collapse in the response
+        seen, duplicates = set(), set()
+        for p in players:
+            (duplicates if p.player_id in seen else seen).add(p.player_id)
+        if duplicates:
+            raise ValueError(f"Duplicate player_id: {', '.join(sorted(duplicates))}")
+        return players
+
 # ==========================================
 # 2. OUTPUT MODELS (What the Backend Returns)
 # ==========================================
@@ -76,4 +99,12 @@ class AnalysisResponse(BaseModel):
     longterm_pattern: Optional[Dict[str, Any]] = None
 
     class Config:
-        extra = "allow" # CRITICAL: Allows backend to send extra fields without error
\ No newline at end of file
+        extra = "allow" # CRITICAL: Allows backend to send extra fields without error
+
+class PlayerForecast(BaseModel):
+    player_id: str
+    forecast: List[float]
+
+class SquadForecastResponse(BaseModel):
+    horizon: int
+    forecasts: List[PlayerForecast]
\ No newline at end of file
@@ -0,0 +1,92 @@
+import time
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import PlayerHistory
+from app.ml.acwr_engine import CHRONIC_DAYS, ACWREngine
+
+# Process-wide squad ACWR state: rebuilt from player_history at most every
+# ACWR_REFRESH_SECONDS (other workers' logs), updated in place by our own /log writes
+acwr_engine = ACWREngine()
+_refreshed_at = 0.0
+_refresh_lock = threading.Lock()
+
+# Training day of a row in SQL (CSV imports carry `date`, /log rows only session_date)
+HISTORY_DAY = func.date(func.coalesce(PlayerHistory.date, PlayerHistory.session_date))
+
+
+def session_day(entry: PlayerHistory) -> date:
+    """ Training day of a row: the CSV `date` if present, else the logged session time. """
+    return as_date(entry.date or entry.session_date) or datetime.utcnow().date()
+
+
+def as_date(value) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10]) # SQLite returns date() as text
+
+
+def refresh(db: Session):
+    """ Rebuilds the whole squad from one aggregate query (daily load totals per player). """
+    global _refreshed_at
+    day = HISTORY_DAY
+    since = datetime.utcnow().date() - timedelta(days=settings.ACWR_LOOKBACK_DAYS)
+    rows = (
+        db.query(
+            PlayerHistory.player_id,
+            day.label("day"),
+            func.sum(func.coalesce(PlayerHistory.load, PlayerHistory.load_total, 0)).label("load"),
+        )
+        .filter(PlayerHistory.player_id.isnot(None), day >= since.isoformat())
+        .group_by(PlayerHistory.player_id, day)
+        .all()
+    )
+    acwr_engine.rebuild(
+        [str(r.player_id) for r in rows],
+        [as_date(r.day) for r in rows],
+        [float(r.load or 0) for r in rows],
+        as_of=datetime.utcnow().date(),
+    )
+    _refreshed_at = time.monotonic()
+
+
+def ensure_fresh(db: Session):
+    if acwr_engine.stale or time.monotonic() - _refreshed_at > settings.ACWR_REFRESH_SECONDS:
+        with _refresh_lock:
+            if acwr_engine.stale or time.monotonic() - _refreshed_at > settings.ACWR_REFRESH_SECONDS:
+                refresh(db)
+
+
+def observe(db: Session, entry: PlayerHistory):
+    """ /log hook: folds the new row into the cached state (first call loads the squad). """
+    if acwr_engine.stale:
+        ensure_fresh(db) # The rebuild already includes this row
+        return
+    acwr_engine.observe(str(entry.player_id), session_day(entry), float(entry.load or entry.load_total or 0))
+
+
+def squad_acwr(db: Session, player_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    ensure_fresh(db)
+    as_of = datetime.utcnow().date()
+    return {"as_of": as_of.isoformat(), "players": acwr_engine.squad(as_of, player_ids)}
+
+
+def measured_acwr(db: Session, player_ids: List[str]) -> Dict[str, float]:
+    """
+    EWMA ACWR of the players with at least a chronic window (28 days) of history.
+    Both EWMAs start from 0, so younger ratios are inflated (one session reads ~3.6).
+    """
+    return {
+        row["player_id"]: row["acwr_ewma"]
+        for row in squad_acwr(db, player_ids)["players"]
+        if row["acwr_ewma"] is not None and row["history_days"] >= CHRONIC_DAYS
+    }
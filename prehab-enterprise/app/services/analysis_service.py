@@ -1,29 +1,65 @@
 from app.models.user import User
 from app.schemas.analytics import AnalysisInput
-from app.ml.lstm_engine import PredictiveService
-
-# Safe Imports for Advanced Engines
-try:
-    from app.ml.anomaly_engine import AnomalyService
-    from app.ml.gnn_engine import GNNEngine
-    from app.ml.rl_engine import RLAgent # <--- NEW IMPORT
-except ImportError:
-    AnomalyService = None
-    GNNEngine = None
-    RLAgent = None
-
-import numpy as np
-
-# === INITIALIZE AI ENGINES ===
-try:
-    gru_engine = PredictiveService()
-    anomaly_engine = AnomalyService() if AnomalyService else None
-    gnn_engine = GNNEngine() if GNNEngine else None
-    rl_agent = RLAgent() if RLAgent else None # <--- NEW INIT
-    print("✅ AI Engines (GRU + Anomaly + GNN + RL) Loaded Successfully")
-except Exception as e:
-    print(f"⚠️ AI Engine Init Error: {e}")
-    gru_engine = None; anomaly_engine = None; gnn_engine = None; rl_agent = None
+from app.core.config import settings
+from fastapi.concurrency import run_in_threadpool
+
+import threading
+from types import SimpleNamespace
+from typing import Dict, List
+
+# === LAZY AI ENGINES ===
+# torch / sklearn are imported and the engines built on the first request that
+# needs them, so workers serving auth / injuries / homework never pay for them.
+_engines = None
+_engines_lock = threading.Lock()
+
+def _load_engines() -> SimpleNamespace:
+    engines = SimpleNamespace(
+        gru_registry=None, training_queue=None, forecast_squad=None,
+        anomaly_engine=None, gnn_engine=None, rl_agent=None
+    )
+
+    # Safe Imports for Advanced Engines
+    try:
+        from app.ml.anomaly_engine import AnomalyService
+        from app.ml.gnn_engine import GNNEngine
+        from app.ml.rl_engine import RLAgent
+    except ImportError:
+        AnomalyService = None
+        GNNEngine = None
+        RLAgent = None
+
+    try:
+        from app.ml.model_registry import ModelRegistry
+        from app.ml.lstm_engine import forecast_squad
+        from app.worker import TrainingQueue
+
+        engines.gru_registry = ModelRegistry(inference_only=settings.GRU_SERVE_EXPORTED, quantize=settings.GRU_QUANTIZE)
+        engines.training_queue = TrainingQueue()
+        engines.forecast_squad = forecast_squad
+        engines.anomaly_engine = AnomalyService() if AnomalyService else None
+        engines.gnn_engine = GNNEngine() if GNNEngine else None
+        engines.rl_agent = RLAgent() if RLAgent else None
+        print("✅ AI Engines (GRU + Anomaly + GNN + RL) Loaded Successfully")
+    except Exception as e:
+        print(f"⚠️ AI Engine Init Error: {e}")
+
+    return engines
+
+def get_engines() -> SimpleNamespace:
+    """ Builds every AI engine once, on first use (thread-safe). """
+    global _engines
+    if _engines is None:
+        with _engines_lock:
+            if _engines is None:
+                _engines = _load_engines()
+    return _engines
+
+def warm_up_engines():
+    """ Optional startup hook: pay the ML import / model load cost before the first request. """
+    get_engines()
+    from app.core.vision_engine import get_vision_engine
+    get_vision_engine().load()
 
 class AnalysisService:
     
@@ -36,6 +72,10 @@ class AnalysisService:
         4. GNN Biomechanics
         5. RL Strategy Coaching
         """
+        engines = await run_in_threadpool(get_engines) # First call imports torch and builds the engines
+        gru_registry, training_queue = engines.gru_registry, engines.training_queue
+        anomaly_engine, gnn_engine, rl_agent = engines.anomaly_engine, engines.gnn_engine, engines.rl_agent
+
         # 1. Standard Analysis
         response = self._run_standard_analysis(user, data)
         
@@ -46,11 +86,18 @@ class AnalysisService:
 
         # 2. PREPARE TIME-SERIES DATA
         history_data = []
+        gru_engine = None
         if data.history and len(data.history) >= 7:
             history_data = data.history
-            if len(history_data) > 14 and gru_engine:
-                try: gru_engine.train_on_history(history_data)
-                except: pass
+            if gru_registry and training_queue:
+                # Serve the latest finished model; retraining happens in app.worker
+                try:
+                    # Can torch.load a cold player's checkpoint: keep it off the event loop
+                    fp = await run_in_threadpool(gru_registry.stale_fingerprint, str(user.id), history_data)
+                    # enqueue is a SQLite write (30s busy timeout): same story
+                    if fp: await run_in_threadpool(training_queue.enqueue, str(user.id), history_data, fp)
+                except Exception as e:
+                    print(f"GRU Queue Error: {e}")
         else:
             # Synthetic Data (Fallback)
             c_load = (data.load_metrics.rpe * data.load_metrics.duration_minutes) / 10 if data.load_metrics else 50
@@ -61,6 +108,8 @@ class AnalysisService:
                 history_data.append([c_load * mod, c_hrv, c_sleep])
 
         # 3. GRU FORECAST
+        if gru_registry:
+            gru_engine = await run_in_threadpool(gru_registry.get_service, str(user.id))
         if gru_engine:
             try: response["forecast"] = gru_engine.predict_next_15_days(history_data)
             except: response["forecast"] = [50]*15
@@ -107,6 +156,20 @@ class AnalysisService:
 
         return response
 
+    def forecast_squad(self, histories: Dict[str, List[List[float]]], horizon: int = 15) -> Dict[str, List[float]]:
+        """
+        Match-day squad forecast: one batched GRU rollout for every player,
+        each served by their own registry model.
+        """
+        engines = get_engines()
+        player_ids = list(histories)
+        if not engines.gru_registry:
+            return {pid: [50] * horizon for pid in player_ids}
+
+        services = [engines.gru_registry.get_service(pid) for pid in player_ids]
+        curves = engines.forecast_squad(services, [histories[pid] for pid in player_ids], horizon)
+        return dict(zip(player_ids, curves))
+
     # =========================================================
     # SPORT LOGIC (Standard)
     # =========================================================
@@ -0,0 +1,53 @@
+import math
+from typing import Any, Dict, List
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import PlayerHistory
+from app.ml.anomaly_engine import StreamingAnomalyDetector
+
+# Process-wide detector, warm from the last snapshot
+anomaly_stream = StreamingAnomalyDetector()
+if anomaly_stream.load(settings.ANOMALY_SNAPSHOT_PATH):
+    print(f"✅ Anomaly stream restored ({len(anomaly_stream.buffers)} players)")
+
+
+def history_row(entry: PlayerHistory) -> List[float]:
+    """ [load, hrv, sleep] of a PlayerHistory row (same coalescing as the forecast batch). """
+    sleep = entry.sleep if entry.sleep is not None else entry.sleep_hours
+    return [math.nan if v is None else float(v) for v in (entry.load, entry.hrv, sleep)]
+
+
+def observe(db: Session, entry: PlayerHistory) -> Dict[str, Any]:
+    """
+    Scores a freshly inserted PlayerHistory row and folds it into the player's window.
+    Rows this process hasn't seen (first sighting since restart, or logged through another
+    worker) are caught up first, but only the last `window` of them matter, so this
+    never scans the full history.
+    """
+    player_id = str(entry.player_id)
+    last_id = anomaly_stream.last_id(player_id)
+
+    missed = db.query(PlayerHistory).filter(
+        PlayerHistory.player_id == entry.player_id,
+        PlayerHistory.id < entry.id,
+    )
+    if last_id is not None:
+        missed = missed.filter(PlayerHistory.id > last_id)
+    missed = missed.order_by(PlayerHistory.id.desc()).limit(anomaly_stream.window).all()
+
+    for row in reversed(missed):
+        anomaly_stream.update(player_id, history_row(row), row.id)
+    verdict = anomaly_stream.update(player_id, history_row(entry), entry.id)
+
+    if anomaly_stream.updates % settings.ANOMALY_SNAPSHOT_EVERY == 0:
+        save_snapshot()
+    return verdict
+
+
+def save_snapshot():
+    try:
+        anomaly_stream.save(settings.ANOMALY_SNAPSHOT_PATH)
+    except Exception as e:
+        print(f"⚠️ Anomaly snapshot failed: {e}")
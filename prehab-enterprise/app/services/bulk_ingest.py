@@ -0,0 +1,236 @@
+"""
+Bulk daily-log ingestion (wearable / GPS exports) for /analytics/log/bulk.
+
+The whole upload is parsed into one DataFrame, validated column-by-column (no
+per-row Pydantic models), derived loads are computed once for the batch, and the
+rows go in with executemany in batched transactions. Problems are reported per
+row (0-based position in the upload) instead of failing the whole request.
+"""
+import io
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import PlayerHistory
+from app.services import acwr_service, daily_state
+from app.services.acwr_service import as_date
+
+FORMATS = ("json", "ndjson", "csv")
+CONTENT_TYPES = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/jsonlines": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+EXTENSIONS = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+
+# LogEntryInput fields, plus what wearable exports usually carry
+REQUIRED = ("player_id", "rpe", "duration")
+# Column name used by exports / the history table -> LogEntryInput name
+ALIASES = {"rpe_score": "rpe", "duration_minutes": "duration", "load_total": "load"}
+# Accepted range per numeric column (None = no upper bound)
+RANGES = {
+    "rpe": (0, 10),
+    "duration": (0, 1440),
+    "sleep_hours": (0, 24),
+    "mood": (0, 10),
+    "soreness": (0, 10),
+    "hrv": (0, 300),
+    "sleep": (0, None),
+    "fatigue": (0, None),
+    "load": (0, None),
+}
+INTEGER_COLUMNS = ("duration", "mood", "soreness")
+
+
+# === PARSING ===
+def detect_format(content_type: Optional[str], filename: Optional[str], body: bytes) -> str:
+    """ Content type, then file extension, then the first non-blank byte. """
+    media = (content_type or "").split(";")[0].strip().lower()
+    if media in CONTENT_TYPES:
+        return CONTENT_TYPES[media]
+    if filename:
+        for ext, fmt in EXTENSIONS.items():
+            if filename.lower().endswith(ext):
+                return fmt
+    head = body.lstrip()[:1]
+    return "json" if head == b"[" else "ndjson" if head == b"{" else "csv"
+
+
+def parse(body: bytes, fmt: str) -> Tuple[pd.DataFrame, Dict[int, List[str]]]:
+    """ Upload -> raw DataFrame (one row per record) plus rows that couldn't be parsed at all. """
+    errors: Dict[int, List[str]] = {}
+    if fmt == "csv":
+        df = pd.read_csv(io.BytesIO(body), dtype=str, skipinitialspace=True, keep_default_na=True)
+    elif fmt == "json":
+        records = json.loads(body)
+        if not isinstance(records, list):
+            raise ValueError("JSON body must be an array of log objects")
+        df = pd.DataFrame.from_records([r if isinstance(r, dict) else {} for r in records])
+        for i, record in enumerate(records):
+            if not isinstance(record, dict):
+                errors[i] = ["not a JSON object"]
+    elif fmt == "ndjson":
+        records = []
+        for i, line in enumerate(l for l in body.splitlines() if l.strip()):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                record, errors[i] = {}, [f"invalid JSON: {e}"]
+            if not isinstance(record, dict):
+                record, errors[i] = {}, ["not a JSON object"]
+            records.append(record)
+        df = pd.DataFrame.from_records(records)
+    else:
+        raise ValueError(f"Unsupported format '{fmt}' (expected one of: {', '.join(FORMATS)})")
+
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.rename(columns={k: v for k, v in ALIASES.items() if k in df.columns and v not in df.columns})
+    return df.reset_index(drop=True), errors
+
+
+# === VALIDATION ===
+def _nested(column: pd.Series) -> pd.Series:
+    """ JSON cells holding a list / object: pd.to_numeric / to_datetime raise TypeError on those. """
+    return column.map(lambda v: isinstance(v, (list, dict))).astype(bool)
+
+
+def validate(df: pd.DataFrame, errors: Dict[int, List[str]]) -> pd.DataFrame:
+    """
+    Column-wise checks over the whole upload; appends messages to `errors` (row -> list)
+    and returns the typed, insert-ready frame (rows with errors are still present).
+    """
+    missing = [c for c in REQUIRED if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    def flag(mask, message: str):
+        for i in np.flatnonzero(np.asarray(mask)):
+            errors.setdefault(int(i), []).append(message)
+
+    out = pd.DataFrame(index=df.index)
+    nested = _nested(df["player_id"])
+    player_id = df["player_id"].mask(nested).astype("string").str.strip()
+    flag(nested, "player_id is not a string")
+    flag(~nested & (player_id.isna() | (player_id == "")), "player_id missing")
+    out["player_id"] = player_id
+
+    for name, (low, high) in RANGES.items():
+        if name not in df.columns:
+            continue
+        nested = _nested(df[name])
+        raw = df[name].mask(nested) # Reported as "not a number" below
+        values = pd.to_numeric(raw, errors="coerce")
+        given = nested | (raw.notna() & (raw.astype("string").str.strip() != ""))
+        flag(given & values.isna(), f"{name} is not a number")
+        if name in REQUIRED:
+            flag(~given, f"{name} missing")
+        out_of_range = values < low
+        if high is not None:
+            out_of_range |= values > high
+        flag(out_of_range, f"{name} out of range [{low}, {high if high is not None else '∞'}]")
+        out[name] = values.round() if name in INTEGER_COLUMNS else values
+
+    if "session_date" in df.columns:
+        stamps = pd.to_datetime(df["session_date"].mask(_nested(df["session_date"])), errors="coerce", utc=True)
+        flag(df["session_date"].notna() & stamps.isna(), "session_date is not a valid date")
+        out["session_date"] = stamps.fillna(pd.Timestamp(datetime.now(timezone.utc)))
+    else:
+        out["session_date"] = pd.Timestamp(datetime.now(timezone.utc))
+    if "date" in df.columns:
+        days = pd.to_datetime(df["date"].mask(_nested(df["date"])), errors="coerce")
+        flag(df["date"].notna() & days.isna(), "date is not a valid date")
+        out["date"] = days.dt.date
+
+    # Derived load for the whole batch: device load if sent, else sRPE (rpe x minutes)
+    srpe = out["rpe"] * out["duration"]
+    out["load"] = out["load"].fillna(srpe) if "load" in out.columns else srpe
+    return out
+
+
+def history_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """ Validated frame -> player_history insert parameters (NaN -> NULL). """
+    columns = {
+        "player_id": "player_id", "rpe": "rpe_score", "duration": "duration_minutes",
+        "load": "load", "sleep_hours": "sleep_hours", "sleep": "sleep", "hrv": "hrv",
+        "mood": "mood", "soreness": "soreness", "fatigue": "fatigue",
+        "session_date": "session_date", "date": "date",
+    }
+    table = df[[c for c in columns if c in df.columns]].rename(columns=columns)
+    table["load_total"] = table["load"]
+    table = table.astype(object).where(table.notna(), None)
+    for name in INTEGER_COLUMNS:
+        target = columns[name]
+        if target in table.columns:
+            table[target] = [None if v is None else int(v) for v in table[target]]
+    return table.to_dict("records")
+
+
+# === INGEST ===
+def ingest(db: Session, body: bytes, fmt: str) -> Dict[str, Any]:
+    """ Parses, validates and inserts an upload. Raises ValueError for unusable files. """
+    df, errors = parse(body, fmt)
+    if len(df) > settings.BULK_INGEST_MAX_ROWS:
+        raise ValueError(f"Too many rows ({len(df)} > {settings.BULK_INGEST_MAX_ROWS}), split the upload")
+    if df.empty:
+        return {"status": "success", "received": 0, "inserted": 0, "rejected": 0, "errors": []}
+
+    clean = validate(df, errors)
+    valid = clean.drop(index=list(errors))
+    records = history_records(valid)
+    positions = valid.index.tolist()
+
+    # executemany per batch, one transaction each: a failing batch doesn't undo earlier ones
+    insert = PlayerHistory.__table__.insert()
+    inserted = 0
+    touched: Dict[str, Any] = {}
+    batch_size = settings.BULK_INGEST_BATCH_ROWS
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        try:
+            db.execute(insert, batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for position in positions[start:start + batch_size]:
+                errors.setdefault(position, []).append(f"insert failed: {str(e).splitlines()[0]}")
+            continue
+        inserted += len(batch)
+        for record in batch:
+            day = as_date(record.get("date") or record["session_date"])
+            if record["player_id"] not in touched or day < touched[record["player_id"]]:
+                touched[record["player_id"]] = day
+
+    if touched:
+        refresh_derived(db, touched)
+
+    return {
+        "status": "success" if inserted else "failed",
+        "received": len(df),
+        "inserted": inserted,
+        "rejected": len(errors),
+        "errors": [{"row": row, "errors": errors[row]} for row in sorted(errors)],
+    }
+
+
+def refresh_derived(db: Session, touched: Dict[str, Any]):
+    """
+    Brings the derived state in line after a bulk insert: one daily_state recompute per
+    player from their earliest new day, and a squad ACWR rebuild on the next read.
+    The anomaly stream catches up by row id on the player's next /log.
+    """
+    acwr_service.acwr_engine.stale = True
+    for player_id, since in touched.items():
+        try:
+            daily_state.recompute_player(db, player_id, since)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Daily state update error ({player_id}): {e}")
@@ -0,0 +1,247 @@
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.models import PlayerDailyState, PlayerHistory
+from app.ml.acwr_engine import (
+    ACUTE_ALPHA, ACUTE_DAYS, CHRONIC_ALPHA, CHRONIC_DAYS, ewma, rolling_mean,
+)
+from app.services.acwr_service import HISTORY_DAY, as_date, session_day
+
+# Days of history before the first materialized day that its rolling windows need
+LEAD_DAYS = CHRONIC_DAYS - 1
+INSERT_BATCH = 5000
+# Extra days read by recent_matrix to carry HRV / sleep forward over rest days
+FILL_LOOKBACK_DAYS = CHRONIC_DAYS
+
+AGGREGATES = ("sessions", "load", "hrv_sum", "hrv_n", "sleep_sum", "sleep_n")
+
+
+def _aggregate(db: Session):
+    """ Daily totals per player straight from player_history (GROUP BY player, day). """
+    sleep = func.coalesce(PlayerHistory.sleep, PlayerHistory.sleep_hours)
+    return (
+        db.query(
+            PlayerHistory.player_id,
+            HISTORY_DAY.label("day"),
+            func.count(PlayerHistory.id).label("sessions"),
+            func.sum(func.coalesce(PlayerHistory.load, PlayerHistory.load_total, 0)).label("load"),
+            func.sum(PlayerHistory.hrv).label("hrv_sum"),
+            func.count(PlayerHistory.hrv).label("hrv_n"),
+            func.sum(sleep).label("sleep_sum"),
+            func.count(sleep).label("sleep_n"),
+        )
+        .filter(PlayerHistory.player_id.isnot(None))
+        .group_by(PlayerHistory.player_id, HISTORY_DAY)
+    )
+
+
+def _scatter(rows, players: Sequence[str], start: date, end: date) -> Dict[str, np.ndarray]:
+    """ Aggregate rows -> dense (players, days) arrays from `start` to `end` (missing days = 0). """
+    index = {p: i for i, p in enumerate(players)}
+    shape = (len(players), (end - start).days + 1)
+    arrays = {name: np.zeros(shape) for name in AGGREGATES}
+    if not rows:
+        return arrays
+    p_idx = np.array([index[str(r.player_id)] for r in rows], dtype=np.int64)
+    d_idx = np.array([(as_date(r.day) - start).days for r in rows], dtype=np.int64)
+    for name in AGGREGATES:
+        arrays[name][p_idx, d_idx] = [float(getattr(r, name) or 0) for r in rows]
+    return arrays
+
+
+def _rolling_nanmean(sums: np.ndarray, counts: np.ndarray, window: int) -> np.ndarray:
+    """ Trailing mean over the readings in each window (days without one don't count). """
+    total = rolling_mean(sums, window) * window
+    n = rolling_mean(counts, window) * window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 0, total / np.where(n > 0, n, 1), np.nan)
+
+
+def compute_states(arrays: Dict[str, np.ndarray], acute_seed=None, chronic_seed=None) -> Dict[str, np.ndarray]:
+    """
+    Vectorized daily state for a whole squad. `arrays` hold LEAD_DAYS of prior days
+    followed by the days to materialize; returns (players, days) state columns.
+    The seeds are the EWMAs as of the day before the first materialized day; without
+    them the EWMAs warm up over the lead days.
+    """
+    load = arrays["load"]
+    if acute_seed is None:
+        acute_seed = ewma(load[:, :LEAD_DAYS], ACUTE_ALPHA)[:, -1]
+    if chronic_seed is None:
+        chronic_seed = ewma(load[:, :LEAD_DAYS], CHRONIC_ALPHA)[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hrv = np.where(arrays["hrv_n"] > 0, arrays["hrv_sum"] / arrays["hrv_n"], np.nan)
+        sleep = np.where(arrays["sleep_n"] > 0, arrays["sleep_sum"] / arrays["sleep_n"], np.nan)
+
+    acute = rolling_mean(load, ACUTE_DAYS)[:, LEAD_DAYS:]
+    chronic = rolling_mean(load, CHRONIC_DAYS)[:, LEAD_DAYS:]
+    acute_ewma = ewma(load[:, LEAD_DAYS:], ACUTE_ALPHA, acute_seed)
+    chronic_ewma = ewma(load[:, LEAD_DAYS:], CHRONIC_ALPHA, chronic_seed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acwr = np.where(chronic > 0, acute / chronic, np.nan)
+        acwr_ewma = np.where(chronic_ewma > 0, acute_ewma / chronic_ewma, np.nan)
+
+    return {
+        "sessions": arrays["sessions"][:, LEAD_DAYS:],
+        "load": load[:, LEAD_DAYS:],
+        "hrv": hrv[:, LEAD_DAYS:],
+        "sleep": sleep[:, LEAD_DAYS:],
+        "acute_load": acute,
+        "chronic_load": chronic,
+        "acute_ewma": acute_ewma,
+        "chronic_ewma": chronic_ewma,
+        "acwr": acwr,
+        "acwr_ewma": acwr_ewma,
+        "hrv_baseline_7d": _rolling_nanmean(arrays["hrv_sum"], arrays["hrv_n"], 7)[:, LEAD_DAYS:],
+        "hrv_baseline_28d": _rolling_nanmean(arrays["hrv_sum"], arrays["hrv_n"], 28)[:, LEAD_DAYS:],
+        "sleep_avg_7d": _rolling_nanmean(arrays["sleep_sum"], arrays["sleep_n"], 7)[:, LEAD_DAYS:],
+    }
+
+
+def _state_rows(player_id: str, first_day: date, states: Dict[str, np.ndarray], p: int, days: range) -> List[Dict[str, Any]]:
+    """ Column arrays -> PlayerDailyState mappings for one player (NaN -> NULL). """
+    rows = []
+    for d in days:
+        row = {"player_id": player_id, "day": first_day + timedelta(days=d)}
+        for name, column in states.items():
+            value = float(column[p, d])
+            row[name] = None if np.isnan(value) else (int(value) if name == "sessions" else round(value, 4))
+        rows.append(row)
+    return rows
+
+
+# === WRITE PATH ===
+def recompute_player(db: Session, player_id: str, since: date):
+    """
+    Rewrites the player's state rows from `since` onwards. A same-day /log touches a
+    single row; a back-dated one re-rolls the days after it. Reads only the 27 days of
+    history before `since` plus the EWMAs of the last state row before it.
+    """
+    start = since - timedelta(days=LEAD_DAYS)
+    rows = _aggregate(db).filter(
+        PlayerHistory.player_id == player_id, HISTORY_DAY >= start.isoformat()
+    ).all()
+    if not rows:
+        return
+    end = max(max(as_date(r.day) for r in rows), since)
+    arrays = _scatter(rows, [player_id], start, end)
+
+    seeds = [None, None]
+    previous = (
+        db.query(PlayerDailyState)
+        .filter(PlayerDailyState.player_id == player_id, PlayerDailyState.day < since)
+        .order_by(PlayerDailyState.day.desc())
+        .first()
+    )
+    if previous is not None:
+        # Decay through the rest days between the last state row and `since`
+        rest = (since - as_date(previous.day)).days - 1
+        seeds = [
+            np.array([(previous.acute_ewma or 0.0) * (1 - ACUTE_ALPHA) ** rest]),
+            np.array([(previous.chronic_ewma or 0.0) * (1 - CHRONIC_ALPHA) ** rest]),
+        ]
+
+    states = compute_states(arrays, *seeds)
+    db.query(PlayerDailyState).filter(
+        PlayerDailyState.player_id == player_id, PlayerDailyState.day >= since
+    ).delete(synchronize_session=False)
+    db.bulk_insert_mappings(PlayerDailyState, _state_rows(player_id, since, states, 0, range((end - since).days + 1)))
+
+
+def record(db: Session, entry: PlayerHistory):
+    """ /log hook: refreshes the state rows affected by a newly inserted history row. """
+    recompute_player(db, str(entry.player_id), session_day(entry))
+    db.commit()
+
+
+# === BACKFILL ===
+def backfill(db: Session) -> int:
+    """ Rebuilds the whole table from player_history in one vectorized pass. Returns rows written. """
+    rows = _aggregate(db).all()
+    db.query(PlayerDailyState).delete(synchronize_session=False)
+    if not rows:
+        db.commit()
+        return 0
+
+    players = sorted({str(r.player_id) for r in rows})
+    first_day = min(as_date(r.day) for r in rows)
+    last_day = max(as_date(r.day) for r in rows)
+    arrays = _scatter(rows, players, first_day - timedelta(days=LEAD_DAYS), last_day)
+    states = compute_states(arrays)
+
+    # Each player is materialized from their first to their last training day
+    active = states["sessions"] > 0
+    written = 0
+    batch = []
+    for p, player_id in enumerate(players):
+        days = np.flatnonzero(active[p])
+        batch.extend(_state_rows(player_id, first_day, states, p, range(days[0], days[-1] + 1)))
+        if len(batch) >= INSERT_BATCH:
+            db.bulk_insert_mappings(PlayerDailyState, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.bulk_insert_mappings(PlayerDailyState, batch)
+        written += len(batch)
+    db.commit()
+    return written
+
+
+# === READ PATH ===
+def recent_matrix(db: Session, player_ids: Sequence[str], days: int = 7) -> Dict[str, List[List[float]]]:
+    """
+    Last `days` [load, hrv, sleep] rows per player from the materialized table (one query).
+    Rest days have no HRV / sleep reading: the last observed value is carried forward
+    (looking up to FILL_LOOKBACK_DAYS further back), so they don't read as 0.
+    """
+    rank = func.row_number().over(
+        partition_by=PlayerDailyState.player_id,
+        order_by=PlayerDailyState.day.desc()
+    ).label("rank")
+    recent = (
+        db.query(
+            PlayerDailyState.player_id,
+            PlayerDailyState.day,
+            PlayerDailyState.load,
+            PlayerDailyState.hrv,
+            PlayerDailyState.sleep,
+            rank,
+        )
+        .filter(PlayerDailyState.player_id.in_(list(player_ids)))
+        .subquery()
+    )
+    rows = (
+        db.query(recent.c.player_id, recent.c.load, recent.c.hrv, recent.c.sleep)
+        .filter(recent.c.rank <= days + FILL_LOOKBACK_DAYS)
+        .order_by(recent.c.player_id, recent.c.day)
+        .all()
+    )
+    histories: Dict[str, List[List[float]]] = {}
+    for row in rows:
+        histories.setdefault(row.player_id, []).append([row.load or 0.0, row.hrv, row.sleep])
+    for player_id, history in histories.items():
+        for col in (1, 2):
+            # Leading gap: nothing observed earlier, use the first reading (0 if none at all)
+            last = next((r[col] for r in history if r[col] is not None), 0.0)
+            for r in history:
+                if r[col] is None:
+                    r[col] = last
+                else:
+                    last = r[col]
+        histories[player_id] = history[-days:]
+    return histories
+
+
+def query_states(db: Session, player_id: Optional[str] = None, since: Optional[date] = None, until: Optional[date] = None):
+    query = db.query(PlayerDailyState)
+    if player_id:
+        query = query.filter(PlayerDailyState.player_id == player_id)
+    if since:
+        query = query.filter(PlayerDailyState.day >= since)
+    if until:
+        query = query.filter(PlayerDailyState.day <= until)
+    return query.order_by(PlayerDailyState.player_id, PlayerDailyState.day)
@@ -0,0 +1,178 @@
+"""
+Columnar player_history export.
+
+Rows are streamed from the database in chunks straight into Arrow record batches
+(no ORM objects), then either sent as an Arrow IPC stream or written as a Parquet
+dataset partitioned by player and month. The engines read the dataset back as
+NumPy arrays without going through Python rows.
+
+pyarrow is optional: only this module imports it, on first use.
+"""
+import io
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import engine as db_engine
+from app.db.models import PlayerHistory
+
+EXPORT_COLUMNS = (
+    "id", "player_id", "session_date", "date", "load", "hrv", "sleep", "fatigue", "mood",
+    "wellness_score", "rpe_score", "duration_minutes", "load_total", "sleep_hours",
+    "sleep_quality", "energy", "soreness",
+)
+INTEGER_COLUMNS = ("id", "duration_minutes", "sleep_quality", "energy", "soreness")
+PARTITION_COLUMNS = ("player_id", "month")
+# [load, hrv, sleep] for the engines, with the same fallbacks the SQL paths use
+METRIC_SOURCES = {"load": ("load", "load_total"), "hrv": ("hrv",), "sleep": ("sleep", "sleep_hours")}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.ipc
+    except ImportError as e:
+        raise RuntimeError("Columnar history export needs pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def partitioning():
+    """ Hive player_id=/month= layout, both strings (so numeric-looking ids aren't read back as ints). """
+    pa = _pyarrow()
+    return pa.dataset.partitioning(pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]), flavor="hive")
+
+
+def history_schema():
+    pa = _pyarrow()
+    types = {"player_id": pa.string(), "session_date": pa.timestamp("us", tz="UTC"), "date": pa.date32()}
+    types.update({name: pa.int64() for name in INTEGER_COLUMNS})
+    return pa.schema([(name, types.get(name, pa.float64())) for name in EXPORT_COLUMNS])
+
+
+# === STREAMING READ ===
+def iter_record_batches(
+    chunk_size: Optional[int] = None,
+    player_ids: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    bind=None,
+) -> Iterator:
+    """
+    Streams player_history as Arrow record batches of `chunk_size` rows, ordered by
+    (player_id, session_date, id). Uses a server-side cursor where the driver has one.
+    """
+    pa = _pyarrow()
+    schema = history_schema()
+    chunk_size = chunk_size or settings.HISTORY_EXPORT_CHUNK_ROWS
+    table = PlayerHistory.__table__
+
+    stmt = select(*[table.c[name] for name in EXPORT_COLUMNS]).where(table.c.player_id.isnot(None))
+    if player_ids:
+        stmt = stmt.where(table.c.player_id.in_(list(player_ids)))
+    if since:
+        stmt = stmt.where(table.c.session_date >= since)
+    stmt = stmt.order_by(table.c.player_id, table.c.session_date, table.c.id)
+
+    with (bind or db_engine).connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(stmt)
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                break
+            columns = zip(*rows) # Row tuples -> column tuples, once per chunk
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            )
+
+
+def arrow_ipc_stream(**filters) -> Iterator[bytes]:
+    """ Arrow IPC stream bytes, flushed after every record batch (for StreamingResponse). """
+    pa = _pyarrow()
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, history_schema())
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    for batch in iter_record_batches(**filters):
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+# === PARQUET DATASET ===
+def export_parquet(root: Optional[str] = None, **filters) -> int:
+    """
+    Writes a Parquet dataset partitioned as player_id=<id>/month=<YYYY-MM>/.
+    Partitions being rewritten are replaced; others are left alone. Returns rows written.
+    """
+    pa = _pyarrow()
+    root = root or settings.HISTORY_EXPORT_DIR
+    base = history_schema()
+    schema = base.append(pa.field("month", pa.string()))
+    written = 0
+
+    def with_month():
+        nonlocal written
+        for batch in iter_record_batches(**filters):
+            month = pa.compute.strftime(batch.column("session_date"), format="%Y-%m")
+            written += batch.num_rows
+            yield pa.RecordBatch.from_arrays(batch.columns + [month], schema=schema)
+
+    pa.dataset.write_dataset(
+        with_month(),
+        root,
+        schema=schema,
+        format="parquet",
+        partitioning=partitioning(),
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=settings.HISTORY_EXPORT_CHUNK_ROWS,
+    )
+    return written
+
+
+def read_history(root: Optional[str] = None, player_ids: Optional[Sequence[str]] = None, columns: Optional[Sequence[str]] = None):
+    """ Arrow table from the exported dataset, sorted by player and session time. """
+    pa = _pyarrow()
+    dataset = pa.dataset.dataset(root or settings.HISTORY_EXPORT_DIR, format="parquet", partitioning=partitioning())
+    if columns is None:
+        columns = sorted({c for sources in METRIC_SOURCES.values() for c in sources})
+    wanted = ["player_id", "session_date", *[c for c in columns if c not in ("player_id", "session_date")]]
+    row_filter = pa.dataset.field("player_id").isin(list(player_ids)) if player_ids else None
+    table = dataset.to_table(columns=wanted, filter=row_filter)
+    return table.sort_by([("player_id", "ascending"), ("session_date", "ascending")])
+
+
+def history_matrices(table, fill: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Splits a history table into per-player (days, 3) [load, hrv, sleep] float64 arrays.
+    Each metric column comes out of Arrow without a copy; they are stacked once and every
+    player's history is a view into that matrix. Missing values become `fill`.
+    """
+    pa = _pyarrow()
+    if table.num_rows == 0:
+        return {}
+    table = table.combine_chunks()
+
+    columns = []
+    for sources in METRIC_SOURCES.values():
+        present = [table.column(name).chunk(0) for name in sources if name in table.column_names]
+        values = pa.compute.coalesce(*present) if len(present) > 1 else present[0]
+        values = values.cast(pa.float64())
+        if values.null_count:
+            values = pa.compute.fill_null(values, fill)
+        columns.append(values.to_numpy(zero_copy_only=True))
+    matrix = np.column_stack(columns)
+
+    players = table.column("player_id").chunk(0).to_numpy(zero_copy_only=False)
+    bounds = np.concatenate([[0], np.flatnonzero(players[1:] != players[:-1]) + 1, [len(players)]])
+    return {str(players[start]): matrix[start:end] for start, end in zip(bounds[:-1], bounds[1:])}
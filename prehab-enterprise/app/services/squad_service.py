@@ -0,0 +1,272 @@
+"""
+Squad file (CSV / XLSX) -> Squad Manager KPIs and chart series.
+
+Everything is columnar: typed chunked parsing, one pd.cut pass for the risk zones
+and chart arrays straight from the frame, so tens of thousands of session rows
+stay well under a second.
+
+Each processed upload is stored as a versioned SquadSnapshot holding the serialized
+report, so dashboards read it back (with ETag revalidation) instead of recomputing.
+
+The ACWR chart uses the measured EWMA ACWR (acwr_service) for players whose "Player"
+matches a player_id with a chronic window of history; the others keep the file estimate.
+"""
+import io
+import json
+import hashlib
+from datetime import datetime
+from typing import IO, Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.squad_snapshot import SquadSnapshot
+from app.services import acwr_service
+
+EXTENSIONS = (".csv", ".xlsx")
+REQUIRED_COLUMNS = ("Player", "Risk Score", "Acute Load", "Recovery")
+DTYPES = {
+    "Player": "string",
+    "Sport": "category",
+    "Acute Load": "float64",
+    "Recovery": "float64",
+    "Risk Score": "float64",
+}
+NUMERIC_COLUMNS = ("Acute Load", "Recovery", "Risk Score")
+
+# Risk Score bands: (lower, upper] per zone
+ZONE_BINS = (-np.inf, 30, 60, np.inf)
+ZONES = (("Green Zone", "#00CC96"), ("Orange Zone", "#FFA15A"), ("Red Zone", "#EF553B"))
+HIGH_RISK_SCORE = 50
+ACWR_LOAD_SCALE = 700 # Estimated ACWR = Acute Load / 700 for players without measured history
+
+
+def is_supported(filename: Optional[str]) -> bool:
+    return bool(filename) and filename.lower().endswith(EXTENSIONS)
+
+
+# === PARSING ===
+def _unwrap_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Spreadsheet exports sometimes quote whole lines ("Player,Sport,...") or keep each
+    row in a single cell (Book1.csv / Book1.xlsx): split that one column back out.
+    """
+    if df.shape[1] != 1 or "," not in str(df.columns[0]):
+        return df
+    names = [name.strip() for name in str(df.columns[0]).split(",")]
+    values = df.iloc[:, 0].astype("string").str.split(",", n=len(names) - 1, expand=True)
+    values.columns = names[:values.shape[1]]
+    return values
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = df.columns.astype(str).str.strip()
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    for name in NUMERIC_COLUMNS:
+        if df[name].dtype != np.float64:
+            df[name] = pd.to_numeric(df[name], errors="coerce")
+    df["Player"] = df["Player"].astype("string").str.strip()
+    return df
+
+
+def read_squad_file(fileobj: IO[bytes], filename: str) -> pd.DataFrame:
+    """ Parses an uploaded squad file into a typed frame (explicit dtypes, CSV read in chunks). """
+    if filename.lower().endswith(".xlsx"):
+        return _typed(_unwrap_rows(pd.read_excel(fileobj, dtype=DTYPES)))
+
+    reader = pd.read_csv(
+        fileobj,
+        dtype=DTYPES,
+        skipinitialspace=True,
+        chunksize=settings.SQUAD_CSV_CHUNK_ROWS,
+    )
+    try:
+        chunks = [_unwrap_rows(chunk) for chunk in reader]
+    except ValueError:
+        # A value didn't fit its declared dtype: re-read untyped and coerce (bad cells -> NaN)
+        fileobj.seek(0)
+        chunks = [_unwrap_rows(chunk) for chunk in pd.read_csv(
+            fileobj, dtype=str, skipinitialspace=True, chunksize=settings.SQUAD_CSV_CHUNK_ROWS
+        )]
+    if not chunks:
+        raise ValueError("Empty squad file")
+    return _typed(pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0])
+
+
+def read_squad_bytes(content: bytes, filename: str) -> pd.DataFrame:
+    return read_squad_file(io.BytesIO(content), filename)
+
+
+# === REPORT ===
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """ Chart rows for the frontend, NaN -> null. """
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def build_squad_report(df: pd.DataFrame, measured: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    KPIs plus the five Squad Manager chart series, all computed column-wise.
+    `measured` (player_id -> EWMA ACWR) overrides the Acute Load estimate per player.
+    """
+    risk = df["Risk Score"]
+    load = df["Acute Load"]
+
+    # Graph 3 values: measured ACWR where known, file estimate otherwise
+    estimate = load / ACWR_LOAD_SCALE
+    known = df["Player"].astype(object).map(measured or {}).astype("float64")
+    acwr = known.fillna(estimate)
+
+    # Graph 2: Risk Zone Distribution (one binning pass)
+    zones = pd.cut(risk, bins=ZONE_BINS, labels=[name for name, _ in ZONES])
+    counts = zones.value_counts(sort=False)
+    risk_zones = [{"name": name, "value": int(counts.get(name, 0)), "color": color} for name, color in ZONES]
+
+    # Graph 4: Training Compliance (Donut)
+    # Mock compliance data
+    compliance_data = [
+        {"name": "Completed", "value": 92, "color": "#00CC96"},
+        {"name": "Missed", "value": 8, "color": "#EF553B"}
+    ]
+
+    # Graph 5: Wellness vs Load Trend, ordered by Acute Load
+    trend = df.sort_values("Acute Load", kind="mergesort")[["Player", "Acute Load", "Recovery"]]
+
+    avg_load = load.mean()
+    return {
+        "status": "success",
+        "kpis": {
+            "squad_readiness": "85%",
+            "high_risk_players": int((risk > HIGH_RISK_SCORE).sum()),
+            "avg_load": round(float(avg_load), 1) if pd.notna(avg_load) else 0,
+            "compliance": "98%"
+        },
+        "charts": {
+            # Graph 1: Load vs Recovery Scatter
+            "scatter": _records(df[["Player", "Acute Load", "Recovery", "Risk Score"]]),
+            "risk_zones": risk_zones,
+            # Graph 3: ACWR Distribution (Bar)
+            "acwr_dist": _records(pd.DataFrame({
+                "name": df["Player"],
+                "value": acwr,
+                "source": np.where(known.notna(), "measured", "estimated"),
+            })),
+            "compliance": compliance_data,
+            "trend": _records(trend.rename(columns={"Player": "name", "Acute Load": "load", "Recovery": "recovery"})),
+        }
+    }
+
+
+def empty_report() -> Dict[str, Any]:
+    """ Dummy payload so the UI doesn't crash if the file is bad. """
+    return {
+        "status": "error",
+        "kpis": {"squad_readiness": "0%", "high_risk_players": 0, "avg_load": 0, "compliance": "0%"},
+        "charts": {
+            "scatter": [], "risk_zones": [], "acwr_dist": [], "compliance": [], "trend": []
+        }
+    }
+
+
+# === SNAPSHOTS ===
+def file_hash(fileobj: IO[bytes]) -> str:
+    """ sha256 of an upload, read in blocks; rewinds the file for parsing. """
+    digest = hashlib.sha256()
+    for block in iter(lambda: fileobj.read(1 << 20), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def snapshot_meta(snapshot: SquadSnapshot) -> Dict[str, Any]:
+    return {
+        "id": snapshot.id,
+        "squad": snapshot.squad,
+        "version": snapshot.version,
+        "filename": snapshot.filename,
+        "rows": snapshot.row_count,
+    }
+
+
+def save_snapshot(db: Session, report: Dict[str, Any], squad: str, filename: str, content_hash: str, rows: int) -> SquadSnapshot:
+    """
+    Stores `report` as the squad's next version. The payload is serialized once, with the
+    snapshot metadata embedded, and its hash is the ETag the GET endpoints serve.
+    """
+    for attempt in range(3):
+        version = (db.query(func.max(SquadSnapshot.version)).filter(SquadSnapshot.squad == squad).scalar() or 0) + 1
+        snapshot = SquadSnapshot(
+            squad=squad, version=version, filename=filename, content_hash=content_hash,
+            row_count=rows, report="", etag="",
+        )
+        try:
+            db.add(snapshot)
+            db.flush() # Assigns the id embedded in the payload
+            body = json.dumps({**report, "snapshot": snapshot_meta(snapshot)}, separators=(",", ":"))
+            snapshot.report = body
+            snapshot.etag = hashlib.sha256(body.encode()).hexdigest()
+            db.commit()
+            return snapshot
+        except IntegrityError:
+            # Concurrent upload took this version number
+            db.rollback()
+            if attempt == 2:
+                raise
+
+
+def find_snapshot(db: Session, squad: str, content_hash: str) -> Optional[SquadSnapshot]:
+    """ Latest snapshot of the same file for this squad (re-uploads aren't recomputed). """
+    return (
+        db.query(SquadSnapshot)
+        .filter(SquadSnapshot.squad == squad, SquadSnapshot.content_hash == content_hash)
+        .order_by(SquadSnapshot.version.desc())
+        .first()
+    )
+
+
+def process_upload(db: Session, fileobj: IO[bytes], filename: str, squad: str) -> Dict[str, Any]:
+    """ Upload -> report, stored as a new snapshot version unless this exact file already is. """
+    content_hash = file_hash(fileobj)
+    today = datetime.utcnow().date().isoformat()
+    try:
+        existing = find_snapshot(db, squad, content_hash)
+    except Exception as e:
+        # No snapshot store (DB down / not migrated): still parse the upload
+        db.rollback()
+        print(f"⚠️ Squad snapshot lookup failed: {e}")
+        existing = None
+    if existing is not None:
+        cached = json.loads(existing.report)
+        # Measured ACWR moves daily: same file on a later day gets a new version
+        if cached.get("acwr_as_of") == today:
+            return cached
+
+    df = read_squad_file(fileobj, filename)
+    try:
+        measured = acwr_service.measured_acwr(db, df["Player"].dropna().unique().tolist())
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Measured ACWR unavailable, using the file estimate: {e}")
+        measured = {}
+    report = build_squad_report(df, measured)
+    report["acwr_as_of"] = today
+    try:
+        snapshot = save_snapshot(db, report, squad, filename, content_hash, len(df))
+        report["snapshot"] = snapshot_meta(snapshot)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ Squad snapshot not saved: {e}")
+    return report
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """ If-None-Match check (weak comparison, lists and "*" allowed). """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/").strip('"') == etag for tag in tags)
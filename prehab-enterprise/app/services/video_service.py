@@ -0,0 +1,243 @@
+import os
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.downsample import downsample_columns
+from app.core.video_cache import VideoResultCache
+from app.core.vision_engine import get_vision_engine
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+# "single": first detected athlete (per-frame series); "squad": every tracked athlete
+ANALYSIS_MODES = ("single", "squad")
+
+video_cache = VideoResultCache()
+
+
+async def save_upload(file: UploadFile) -> Tuple[str, str]:
+    """
+    Streams an upload to a temp file chunk by chunk, hashing it on the way. Returns (path, sha256).
+    Disk writes go through the threadpool so a slow disk doesn't stall the event loop.
+    """
+    suffix = os.path.splitext(file.filename or "")[1]
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(prefix="clip_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk: break
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def _cache_key(content_hash: str, mode: str = "single") -> str:
+    engine = get_vision_engine()
+    # Squad runs always use fixed sampling (see analyze_tracks)
+    params = {"frame_stride": engine.frame_stride, "mode": mode} if mode != "single" else engine.sampling_params
+    return video_cache.make_key(content_hash, engine.model_version, params)
+
+
+def _series(arrays: Dict[str, Any], mode: str = "single") -> Optional[Dict[str, Any]]:
+    """ Per-frame chart columns only (the raw skeletons stay in the cache). Squad runs have none. """
+    if mode != "single":
+        return None
+    return {name: column for name, column in arrays.items() if name != "keypoints"}
+
+
+def lookup_cached(content_hash: str, mode: str = "single") -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """ Cached (result, per-frame series) for this clip, if any (counts a hit / miss). """
+    cached = video_cache.get(_cache_key(content_hash, mode))
+    return (cached[0], _series(cached[1], mode)) if cached is not None else None
+
+
+def run_analysis_job(
+    job_id: str, path: str, content_hash: str, progress, mode: str = "single"
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Process-pool entry point: analyzes a saved clip, caches the result and
+    removes the temp file. `progress` is a shared dict updated per batch.
+    Returns (result, per-frame series) to the API process.
+    """
+    def report(frames_done: int, total_frames: int):
+        progress[job_id] = min(frames_done / total_frames, 1.0) if total_frames else 0.0
+
+    try:
+        engine = get_vision_engine()
+        if mode == "squad":
+            result, arrays = engine.analyze_tracks(path, return_arrays=True, progress=report)
+        else:
+            result, arrays = engine.analyze_video(path, return_arrays=True, progress=report)
+        video_cache.put(_cache_key(content_hash, mode), result, arrays)
+        return result, _series(arrays, mode)
+    finally:
+        try: os.remove(path)
+        except FileNotFoundError: pass
+
+
+class VideoJobManager:
+    """
+    Runs clip analyses in a process pool so several uploads are processed in
+    parallel without blocking the API event loop. Jobs are tracked in memory
+    (per API process) and polled by id.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, history: Optional[int] = None):
+        self.max_workers = max_workers or settings.VIDEO_WORKERS
+        self.history = history or settings.VIDEO_JOB_HISTORY
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._manager = None
+        self._progress = None
+
+    def _ensure_pool(self):
+        # Spawned lazily: the pool (and each worker's YOLO model) only exists once a clip arrives
+        if self._pool is None:
+            ctx = multiprocessing.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._progress = self._manager.dict()
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+
+    def submit(self, path: str, content_hash: str, filename: Optional[str] = None, mode: str = "single") -> str:
+        job_id = uuid.uuid4().hex
+        job = {"job_id": job_id, "filename": filename, "mode": mode, "status": "queued", "progress": 0.0,
+               "created_at": time.time(), "result": None, "error": None}
+
+        cached = lookup_cached(content_hash, mode)
+        if cached is not None:
+            os.remove(path)
+            result, series = cached
+            job.update(status="done", progress=1.0, result=build_response(result, True, mode), _series=series)
+            with self._lock:
+                self._track(job)
+            return job_id
+
+        with self._lock:
+            try:
+                self._ensure_pool()
+                future = self._pool.submit(run_analysis_job, job_id, path, content_hash, self._progress, mode)
+            except Exception:
+                # The worker never got the clip: nobody else will delete it
+                os.remove(path)
+                raise
+            self._track(job)
+            job["status"] = "running"
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def _track(self, job: Dict[str, Any]):
+        """ Registers a job (caller holds the lock) and forgets the oldest finished ones. """
+        self.jobs[job["job_id"]] = job
+        finished = [jid for jid, j in self.jobs.items() if j["status"] in ("done", "failed")]
+        for jid in finished[:max(0, len(self.jobs) - self.history)]:
+            del self.jobs[jid]
+
+    def _finish(self, job_id: str, future):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            try:
+                result, series = future.result()
+                job.update(status="done", progress=1.0, result=build_response(result, False, job["mode"]), _series=series)
+            except Exception as e:
+                job.update(status="failed", error=str(e))
+            self._progress.pop(job_id, None)
+
+    def get(self, job_id: str, points: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """ Job snapshot; finished jobs carry their per-frame series downsampled to `points`. """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = dict(job)
+        series = snapshot.pop("_series", None)
+        if snapshot["status"] == "running" and self._progress is not None:
+            snapshot["progress"] = round(self._progress.get(job_id, 0.0), 3)
+        if snapshot["result"] is not None and series is not None:
+            snapshot["result"] = dict(snapshot["result"], timeseries=build_timeseries(series, points))
+        return snapshot
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+
+
+def build_video_response(result: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+    """ Shapes an analyze_video result for the dashboard. """
+    critical = result["valgus"] > 10 or result["hip_rotation"] != "Normal"
+    return {
+        "status": "success",
+        "cached": cached,
+        "metrics": {
+            "peak_valgus": f"{result['valgus']:.1f}°",
+            "hip_rotation": result["hip_rotation"],
+            "foot_strike": result["foot_strike"],
+            "critical_state": "Unstable" if critical else "Stable"
+        },
+        "legs": result["legs"],
+        "pipeline": result["pipeline"]
+    }
+
+
+def build_squad_response(result: Dict[str, Any], cached: bool) -> Dict[str, Any]:
+    """ Shapes an analyze_tracks result: one report per tracked athlete, worst valgus first. """
+    tracks = []
+    for track in sorted(result["tracks"], key=lambda t: t["valgus"], reverse=True):
+        critical = track["valgus"] > 10 or track["hip_rotation"] != "Normal"
+        tracks.append({
+            "track_id": track["track_id"],
+            "frames": track["frames"],
+            "first_frame": track["first_frame"],
+            "last_frame": track["last_frame"],
+            "metrics": {
+                "peak_valgus": f"{track['valgus']:.1f}°",
+                "hip_rotation": track["hip_rotation"],
+                "foot_strike": track["foot_strike"],
+                "critical_state": "Unstable" if critical else "Stable"
+            },
+            "legs": track["legs"],
+        })
+    return {
+        "status": "success",
+        "cached": cached,
+        "athletes": len(tracks),
+        "tracks": tracks,
+        "pipeline": result["pipeline"]
+    }
+
+
+def build_response(result: Dict[str, Any], cached: bool, mode: str = "single") -> Dict[str, Any]:
+    return build_squad_response(result, cached) if mode == "squad" else build_video_response(result, cached)
+
+
+def build_timeseries(series: Dict[str, Any], points: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Chart payload for the per-frame kinematics: each "{side}_{metric}" column is
+    LTTB-downsampled to at most `points` samples, so long clips stay a few KB of JSON.
+    """
+    points = points or settings.VIDEO_TIMESERIES_POINTS
+    return {
+        "frames": int(len(series.get("frame", ()))),
+        "points": points,
+        "series": downsample_columns(series, points, x_key="frame"),
+    }
+
+
+video_jobs = VideoJobManager()
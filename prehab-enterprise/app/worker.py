@@ -0,0 +1,156 @@
+"""
+Background GRU training worker.
+
+API processes enqueue "retrain player X" jobs into a local SQLite queue; this worker
+drains it in its own process and publishes weights through the ModelRegistry, which
+the API picks up on the next /analyze.
+
+Run standalone with:  python -m app.worker
+"""
+import json
+import sqlite3
+import time
+import multiprocessing
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class TrainingQueue:
+    """
+    SQLite-backed retrain queue (no external broker).
+    One row per player: a new job for a player that is already queued just replaces
+    the pending history, so five logs in a row still produce a single retrain.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.TRAINING_QUEUE_PATH
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS training_jobs (
+                    player_id TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    history TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    error TEXT
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit mode: we manage transactions explicitly where it matters
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, player_id: str, history: List[List[float]], fingerprint: str) -> bool:
+        """
+        Queues a retrain. Returns False when the same history is already queued/trained, or
+        failed less than TRAINING_RETRY_SECONDS ago (a deterministic failure isn't retried
+        on every /analyze).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute("""
+                INSERT INTO training_jobs (player_id, fingerprint, history, status, enqueued_at)
+                VALUES (?, ?, ?, 'pending', ?)
+                ON CONFLICT(player_id) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    history = excluded.history,
+                    status = 'pending',
+                    enqueued_at = CASE WHEN training_jobs.status = 'pending'
+                                       THEN training_jobs.enqueued_at
+                                       ELSE excluded.enqueued_at END,
+                    error = NULL
+                WHERE training_jobs.fingerprint != excluded.fingerprint
+                   OR (training_jobs.status = 'failed' AND training_jobs.finished_at < ?)
+            """, (str(player_id), fingerprint, json.dumps(history), now, now - settings.TRAINING_RETRY_SECONDS))
+            return cur.rowcount > 0
+
+    def claim(self) -> Optional[Tuple[str, str, List[List[float]]]]:
+        """ Atomically takes the oldest pending job: (player_id, fingerprint, history). """
+        with self._connect() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("""
+                    SELECT player_id, fingerprint, history FROM training_jobs
+                    WHERE status = 'pending' ORDER BY enqueued_at LIMIT 1
+                """).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE training_jobs SET status = 'running', started_at = ? WHERE player_id = ?",
+                    (time.time(), row[0])
+                )
+                conn.execute("COMMIT")
+                return row[0], row[1], json.loads(row[2])
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def finish(self, player_id: str, fingerprint: str, error: Optional[str] = None):
+        """ Marks a claimed job done/failed, unless a newer history was queued meanwhile. """
+        with self._connect() as conn:
+            conn.execute("""
+                UPDATE training_jobs SET status = ?, finished_at = ?, error = ?
+                WHERE player_id = ? AND fingerprint = ? AND status = 'running'
+            """, ("failed" if error else "done", time.time(), error, player_id, fingerprint))
+
+    def requeue_stale(self):
+        """ Jobs left 'running' by a crashed worker go back to pending on startup. """
+        with self._connect() as conn:
+            conn.execute("UPDATE training_jobs SET status = 'pending' WHERE status = 'running'")
+
+    def status(self, player_id: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status FROM training_jobs WHERE player_id = ?", (str(player_id),)
+            ).fetchone()
+            return row[0] if row else None
+
+
+# === WORKER LOOP ===
+def run_worker(poll_interval: Optional[float] = None):
+    """ Drains the training queue forever, one player at a time. """
+    # Heavy imports stay inside the worker process
+    from app.ml.model_registry import ModelRegistry
+
+    poll_interval = poll_interval or settings.TRAINING_POLL_INTERVAL
+    queue = TrainingQueue()
+    queue.requeue_stale()
+    registry = ModelRegistry()
+    print("✅ GRU Training Worker started")
+
+    while True:
+        job = queue.claim()
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        player_id, fingerprint, history = job
+        try:
+            trained = registry.train(player_id, history, fingerprint)
+            queue.finish(player_id, fingerprint, None if trained else "Not enough history")
+        except Exception as e:
+            print(f"⚠️ Training failed for {player_id}: {e}")
+            queue.finish(player_id, fingerprint, str(e))
+
+
+def start_worker_process() -> multiprocessing.Process:
+    """ Spawns the worker next to the API (spawn, not fork, so torch state isn't shared). """
+    ctx = multiprocessing.get_context("spawn")
+    process = ctx.Process(target=run_worker, name="gru-training-worker", daemon=True)
+    process.start()
+    return process
+
+
+if __name__ == "__main__":
+    run_worker()
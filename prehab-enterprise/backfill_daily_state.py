@@ -0,0 +1,33 @@
+import sys
+import os
+import time
+
+# Ensure we can import app
+sys.path.append(os.getcwd())
+
+from app.db.database import SessionLocal, engine
+from app.db.database import Base as BaseOld
+from app.db.models import PlayerDailyState
+from app.services.daily_state import backfill
+
+# Rebuilds player_daily_state from every player_history row.
+# Run once after deploying the table (and after bulk imports that bypass /analytics/log).
+
+
+def run():
+    BaseOld.metadata.create_all(bind=engine, tables=[PlayerDailyState.__table__])
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        written = backfill(db)
+        print(f"✅ player_daily_state: {written} rows in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Backfill failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
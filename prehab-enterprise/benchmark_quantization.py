@@ -0,0 +1,52 @@
+import io
+import time
+import numpy as np
+import torch
+
+from app.ml.lstm_engine import PredictiveService
+
+# Float32 vs dynamic int8 SportsGRU on CPU: latency, model memory, forecast drift
+REPEATS = 200
+
+
+def model_bytes(model):
+    """ Serialized state_dict size (packed int8 weights included). """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def latency_ms(service, history):
+    service.predict_next_15_days(history)  # warm-up
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        service.predict_next_15_days(history)
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def run_benchmark(tolerance: float = 2.0):
+    torch.set_num_threads(1)
+    rng = np.random.default_rng(3)
+    history = np.column_stack([
+        rng.uniform(300, 900, 90), rng.uniform(40, 100, 90), rng.uniform(5, 9, 90)
+    ]).tolist()
+    train, holdout = history[:60], history[60:]
+
+    trained = PredictiveService()
+    trained.train_on_history(train)
+
+    float_service = PredictiveService(inference_only=True)
+    float_service.load_state(trained.get_state())
+    int8_service = PredictiveService(inference_only=True)
+    int8_service.load_state(trained.get_state())
+    accepted = int8_service.quantize(holdout, tolerance)
+
+    print(f"Accuracy guard: drift {int8_service.quantization_drift:.3f} risk pts "
+          f"(tolerance {tolerance}) -> {'int8 accepted' if accepted else 'fell back to float'}")
+    print(f"{'Mode':>8} | {'Latency (ms)':>12} | {'Model size (KB)':>15}")
+    for name, service in (("float32", float_service), ("int8", int8_service)):
+        print(f"{name:>8} | {latency_ms(service, holdout):>12.2f} | {model_bytes(service.model) / 1024:>15.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
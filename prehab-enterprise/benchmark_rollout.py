@@ -0,0 +1,61 @@
+import time
+import numpy as np
+import torch
+
+from app.ml.lstm_engine import PredictiveService
+
+# Micro-benchmark: legacy per-step rollout vs autoregressive_rollout
+HORIZONS = [15, 30, 60]
+REPEATS = 50
+
+
+def legacy_rollout(service, recent_history, horizon):
+    """ The old predict_next_15_days loop (.item() syncs, tensor rebuild, torch.cat). """
+    input_seq = np.array(recent_history[-7:])
+    input_scaled = service.scaler.transform(input_seq)
+    current_seq = torch.tensor(input_scaled, dtype=torch.float32).unsqueeze(0)
+
+    predictions = []
+    service.model.eval()
+    with torch.no_grad():
+        for _ in range(horizon):
+            pred_val = service.model(current_seq)
+            predictions.append(pred_val.item())
+            avg_hrv = input_seq[:, 1].mean()
+            avg_sleep = input_seq[:, 2].mean()
+            new_step = torch.tensor([[pred_val.item(), avg_hrv, avg_sleep]], dtype=torch.float32)
+            current_seq = torch.cat((current_seq[:, 1:, :], new_step.unsqueeze(0)), dim=1)
+    return [max(0, min(100, p * 100)) for p in predictions]
+
+
+def time_it(fn):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def run_benchmark():
+    torch.set_num_threads(1)
+    rng = np.random.default_rng(0)
+    history = np.column_stack([
+        rng.uniform(300, 900, 60), rng.uniform(40, 100, 60), rng.uniform(5, 9, 60)
+    ]).tolist()
+
+    service = PredictiveService()
+    service.train_on_history(history)
+
+    print(f"{'Horizon':>8} | {'Legacy (ms)':>12} | {'Rollout (ms)':>12} | {'Speedup':>8} | {'Max diff':>9}")
+    for horizon in HORIZONS:
+        legacy = time_it(lambda: legacy_rollout(service, history, horizon))
+        rollout = time_it(lambda: service.predict_next_15_days(history, horizon))
+        diff = np.max(np.abs(
+            np.array(legacy_rollout(service, history, horizon)) -
+            np.array(service.predict_next_15_days(history, horizon))
+        ))
+        print(f"{horizon:>8} | {legacy:>12.2f} | {rollout:>12.2f} | {legacy / rollout:>7.2f}x | {diff:>9.2e}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,41 @@
+import sys
+
+from app.core.vision_engine import VisionEngine
+
+# Adaptive (motion-driven) frame sampling vs dense and fixed-stride sampling:
+# inference count, wall time, and how far the valgus numbers move from the dense run.
+# Usage: python benchmark_sampling.py path/to/clip.mp4 [inference_budget]
+
+
+def run_benchmark(video_path, budget=600):
+    dense = VisionEngine(frame_stride=1)
+    model = dense.load()
+
+    configs = [
+        ("dense (every frame)", dense),
+        ("fixed (every 3rd)", VisionEngine(frame_stride=3)),
+        (f"adaptive (budget {budget})", VisionEngine(sampling="adaptive", inference_budget=budget)),
+    ]
+
+    baseline = None
+    print(f"{'Sampling':<24} | {'Inferences':>10} | {'Seconds':>8} | {'Speedup':>8} | {'R valgus':>8} | {'dR':>6} | {'L valgus':>8} | {'dL':>6}")
+    for name, engine in configs:
+        engine._model = model  # Share the loaded weights
+        result = engine.analyze_video(video_path)
+        stats = result["pipeline"]
+        right, left = result["legs"]["right"]["valgus"], result["legs"]["left"]["valgus"]
+        if baseline is None:
+            baseline = (stats["seconds"], right, left)
+        print(f"{name:<24} | {stats['frames_analyzed']:>10} | {stats['seconds']:>8.2f} | "
+              f"{baseline[0] / stats['seconds']:>7.2f}x | {right:>8.1f} | {right - baseline[1]:>+6.1f} | "
+              f"{left:>8.1f} | {left - baseline[2]:>+6.1f}")
+        if stats["sampling"]["mode"] == "adaptive":
+            print(f"{'':<24}   motion events: {stats['sampling']['motion_events']}, "
+                  f"sparse stride: {stats['sampling']['sparse_stride']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python benchmark_sampling.py path/to/clip.mp4 [inference_budget]")
+        raise SystemExit(1)
+    run_benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 600)
@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+import numpy as np
+
+# Ensure we can import app
+sys.path.append(os.getcwd())
+
+from app.services.squad_service import build_squad_report, read_squad_bytes
+
+# Squad upload pipeline (parse + KPIs + chart series) on a synthetic session file.
+# Usage: python benchmark_squad_upload.py [rows]
+
+
+def run_benchmark(rows=50000):
+    rng = np.random.default_rng(3)
+    lines = ["Player,Sport,Acute Load,Recovery,Risk Score"]
+    lines += [
+        f"Player {i % 40},{'Football' if i % 3 else 'Cricket'},{load:.2f},{recovery:.0f},{risk:.0f}"
+        for i, (load, recovery, risk) in enumerate(zip(
+            rng.uniform(0.6, 1.9, rows), rng.uniform(20, 100, rows), rng.uniform(0, 100, rows)
+        ))
+    ]
+    content = "\n".join(lines).encode()
+
+    started = time.perf_counter()
+    df = read_squad_bytes(content, "squad.csv")
+    parsed = time.perf_counter()
+    report = build_squad_report(df)
+    done = time.perf_counter()
+
+    print(f"Rows: {rows} ({len(content) / 1e6:.1f} MB)")
+    print(f"Parse:  {parsed - started:.3f}s")
+    print(f"Report: {done - parsed:.3f}s")
+    print(f"Total:  {done - started:.3f}s  {'✅' if done - started < 1 else '⚠️'}")
+    print(f"Zones:  {[(z['name'], z['value']) for z in report['charts']['risk_zones']]}")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
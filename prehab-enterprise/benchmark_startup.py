@@ -0,0 +1,75 @@
+import os
+import re
+import sys
+import time
+import subprocess
+import urllib.request
+
+# Tracks API cold start: `import app.main` cost and `uvicorn app.main:app` time-to-first-response
+HEAVY_MODULES = ["torch", "sklearn", "ultralytics", "cv2"]
+RUNS = 5
+PORT = 8765
+
+
+def import_profile():
+    """ Imports app.main in a fresh interpreter with -X importtime. """
+    probe = (
+        "import sys, time; t = time.perf_counter(); import app.main; "
+        "print('ELAPSED', time.perf_counter() - t); "
+        f"print('HEAVY', [m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    elapsed = float(re.search(r"ELAPSED ([\d.]+)", result.stdout).group(1))
+    heavy = re.search(r"HEAVY (\[.*\])", result.stdout).group(1)
+
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    top_level = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s(\S.*)$", line)
+        if match and not match.group(2).startswith(" "):
+            top_level.append((int(match.group(1)), match.group(2)))
+    return elapsed, heavy, sorted(top_level, reverse=True)[:10]
+
+
+def uvicorn_cold_start(timeout: float = 120.0):
+    """ Seconds from launching uvicorn until /docs answers. """
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{PORT}/docs", timeout=1)
+                return time.perf_counter() - start
+            except Exception:
+                time.sleep(0.05)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_benchmark():
+    timings = []
+    for _ in range(RUNS):
+        elapsed, heavy, top = import_profile()
+        timings.append(elapsed)
+
+    print(f"import app.main: median {sorted(timings)[RUNS // 2] * 1000:.0f} ms over {RUNS} runs")
+    print(f"Heavy ML modules loaded at import: {heavy}")
+    print("Slowest top-level imports (cumulative):")
+    for micros, name in top:
+        print(f"  {micros / 1000:>8.1f} ms  {name}")
+
+    cold = uvicorn_cold_start()
+    print(f"uvicorn app.main:app cold start: {cold:.2f} s" if cold else "uvicorn did not come up")
+
+
+if __name__ == "__main__":
+    run_benchmark()
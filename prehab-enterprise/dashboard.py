@@ -197,6 +197,95 @@ def get_readiness_color(score):
     if score >= 50: return "#FFA15A" # Orange
     return "#EF553B" # Red
 
+def analyze_video_via_api(uploaded_file, progress):
+    """ Submits a clip to /biometrics/analyze_video and polls the job until the result is ready. """
+    res = requests.post(
+        f"{API_URL}/biometrics/analyze_video",
+        files={"file": (uploaded_file.name, uploaded_file, uploaded_file.type or "video/mp4")},
+        timeout=300,
+    )
+    res.raise_for_status()
+    job = res.json()
+    while job["status"] not in ("done", "failed"):
+        progress.progress(min(float(job.get("progress") or 0), 1.0), text=f"Processing Kinetic Chain... {job['status']}")
+        time.sleep(1)
+        job = requests.get(f"{API_URL}/biometrics/jobs/{job['job_id']}", timeout=10).json()
+    if job["status"] == "failed":
+        raise RuntimeError(job.get("error") or "Video analysis failed")
+    return job["result"]
+
+def leg_radar_scores(legs):
+    """ 0-100 movement quality scores from the measured left / right leg summaries. """
+    def score(v):
+        return int(round(max(0.0, min(100.0, v))))
+    left, right = legs["left"], legs["right"]
+    return {
+        "Stability": score(100 - max(left["valgus"], right["valgus"]) * 4),
+        "Symmetry": score(100 - abs(left["valgus"] - right["valgus"]) * 5),
+        "Hip Control": score(100 - max(left["hip_ratio"], right["hip_ratio"]) * 1000),
+        "Strike": score(100 - max(0.0, -right["shin_angle"]) * 5),
+    }
+
+def fetch_squad_snapshot(team_file):
+    """
+    Uploads a squad file once, then reads the stored snapshot back on every rerun with
+    If-None-Match (304 = reuse the cached report). None if the API is unavailable.
+    """
+    cached = st.session_state.get("squad_snapshot")
+    file_key = (team_file.name, team_file.size)
+    try:
+        if not cached or cached["file"] != file_key:
+            res = requests.post(f"{API_URL}/squad/upload_csv", files={"file": (team_file.name, team_file.getvalue())}, timeout=30)
+            report = res.json()
+            if res.status_code != 200 or report.get("status") != "success":
+                return None
+            cached = {"file": file_key, "report": report, "etag": None}
+
+        snapshot_id = (cached["report"].get("snapshot") or {}).get("id")
+        if snapshot_id:
+            headers = {"If-None-Match": cached["etag"]} if cached["etag"] else {}
+            res = requests.get(f"{API_URL}/squad/snapshots/{snapshot_id}", headers=headers, timeout=10)
+            if res.status_code == 200:
+                cached["report"], cached["etag"] = res.json(), res.headers.get("ETag")
+
+        st.session_state.squad_snapshot = cached
+        return cached["report"]
+    except Exception:
+        return None
+
+def local_squad_report(team_file):
+    """
+    Offline fallback: builds the same {"kpis", "charts"} shape as the API snapshot from the
+    file, once per file (kept in session state, so reruns don't recompute it).
+    """
+    cached = st.session_state.get("squad_local")
+    file_key = (team_file.name, team_file.size)
+    if cached and cached["file"] == file_key:
+        return cached["report"]
+
+    df = pd.read_excel(team_file) if team_file.name.endswith('.xlsx') else pd.read_csv(team_file)
+    df.columns = df.columns.str.strip()
+    zones = pd.cut(df['Risk Score'], bins=[-np.inf, 30, 60, np.inf], labels=['Green Zone', 'Orange Zone', 'Red Zone']).value_counts(sort=False)
+    colors = {'Green Zone': '#00CC96', 'Orange Zone': '#FFA15A', 'Red Zone': '#EF553B'}
+    trend = df.sort_values('Acute Load')
+    report = {
+        "kpis": {
+            "squad_readiness": "85%",
+            "high_risk_players": int((df['Risk Score'] > 50).sum()),
+            "avg_load": round(float(df['Acute Load'].mean()), 1),
+            "compliance": "98%",
+        },
+        "charts": {
+            "scatter": df[['Player', 'Acute Load', 'Recovery', 'Risk Score']].to_dict("records"),
+            "risk_zones": [{"name": name, "value": int(count), "color": colors[name]} for name, count in zones.items()],
+            "acwr_dist": [{"name": p, "value": v / 700} for p, v in zip(df['Player'], df['Acute Load'])],
+            "compliance": [{"name": "Completed", "value": 92, "color": "#00CC96"}, {"name": "Missed", "value": 8, "color": "#EF553B"}],
+            "trend": [{"name": p, "load": l, "recovery": r} for p, l, r in zip(trend['Player'], trend['Acute Load'], trend['Recovery'])],
+        },
+    }
+    st.session_state.squad_local = {"file": file_key, "report": report}
+    return report
+
 def render_battery_widget(label, value, subtext=None):
     color = get_readiness_color(value)
     st.markdown(f"""
@@ -240,123 +329,124 @@ def render_coach_view():
             uploaded_file = st.file_uploader("video_input", label_visibility="collapsed", type=['mp4', 'mov', 'avi'])
             
             if uploaded_file:
-                # 1. Check File Size (Limit to 50MB to prevent browser crash)
-                if uploaded_file.size > 50 * 1024 * 1024:
-                    st.error("⚠️ File too large (>50MB). Please upload a smaller clip.")
-                    uploaded_file = None
-                else:
-                    try:
-                        st.video(uploaded_file)
-                    except Exception as e:
-                        st.error(f"Error rendering video: {e}")
+                try:
+                    st.video(uploaded_file)
+                except Exception as e:
+                    st.error(f"Error rendering video: {e}")
         
         with col_right:
             if uploaded_file:
+                file_key = (uploaded_file.name, uploaded_file.size)
                 if st.button("🚀 Execute Physics Engine + GNN", type="primary", use_container_width=True):
                     try:
-                        with st.spinner("Processing Kinetic Chain..."):
-                            # MOCK DATA GENERATION FOR DEMO
-                            time.sleep(1.5) # Simulate processing
-                            
-                            # Data for Timeline
-                            frames = list(range(0, 50))
-                            knee_flexion = [45 + 15 * np.sin(i/5) for i in frames]
-                            valgus_stress = [5 + 2 * np.cos(i/3) + np.random.normal(0, 0.5) for i in frames]
-                            
-                            # Data for GRF
-                            grf_left = [0 if i < 10 or i > 40 else 800 + 100*np.random.randn() for i in frames]
-                            grf_right = [0 if i < 12 or i > 42 else 750 + 100*np.random.randn() for i in frames]
-
-                            # 1. METRIC CARDS
-                            m1, m2, m3, m4 = st.columns(4)
-                            m1.metric("ACL Risk Probability", "78.5%", "+12%", delta_color="inverse")
-                            m2.metric("Critical Failure", "L_Knee", "Unstable")
-                            m3.metric("Peak Valgus", "18.5°", "High Risk")
-                            m4.metric("Landing Force", "3.2 BW", "Normal")
-
-                            st.divider()
-
-                            # --- ROW 1: CORE BIOMECHANICS ---
-                            c1, c2, c3 = st.columns(3)
-                            
-                            with c1:
-                                st.markdown("#### 1️⃣ Joint Dependency Graph")
-                                fig_gnn = go.Figure()
-                                nodes = ["Hip", "Knee", "Ankle", "Foot"]
-                                x_nodes = [1, 2, 2, 1]
-                                y_nodes = [3, 2, 1, 0]
-                                fig_gnn.add_trace(go.Scatter(x=x_nodes, y=y_nodes, mode='lines', line=dict(color='#30363D', width=2), hoverinfo='none'))
-                                fig_gnn.add_trace(go.Scatter(
-                                    x=x_nodes, y=y_nodes, mode='markers+text', text=nodes, textposition="top right",
-                                    marker=dict(size=20, color=['#00CC96', '#EF553B', '#FFA15A', '#00CC96'])
-                                ))
-                                fig_gnn.update_layout(height=250, margin=dict(l=10, r=10, t=10, b=10), xaxis=dict(visible=False), yaxis=dict(visible=False), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
-                                st.plotly_chart(fig_gnn, use_container_width=True)
-
-                            with c2:
-                                st.markdown("#### 2️⃣ Dynamic ACL Risk Gauge")
-                                fig_gauge = go.Figure(go.Indicator(
-                                    mode = "gauge+number", value = 18.5,
-                                    domain = {'x': [0, 1], 'y': [0, 1]},
-                                    gauge = {
-                                        'axis': {'range': [0, 30]}, 
-                                        'bar': {'color': "#EF553B"},
-                                        'steps': [{'range': [0, 15], 'color': "#00CC96"}, {'range': [15, 30], 'color': "#30363D"}]
-                                    }
-                                ))
-                                fig_gauge.update_layout(height=250, margin=dict(l=20, r=20, t=30, b=20), paper_bgcolor='rgba(0,0,0,0)')
-                                st.plotly_chart(fig_gauge, use_container_width=True)
-
-                            with c3:
-                                st.markdown("#### 3️⃣ Athlete vs Elite Benchmark")
-                                categories = ['Stability', 'Symmetry', 'Force', 'Mobility', 'Power']
-                                fig_radar = go.Figure()
-                                fig_radar.add_trace(go.Scatterpolar(r=[50, 40, 80, 60, 70], theta=categories, fill='toself', name='Athlete', line_color='#EF553B'))
-                                fig_radar.add_trace(go.Scatterpolar(r=[90, 95, 80, 85, 90], theta=categories, fill='toself', name='Elite', line_color='#00CC96', opacity=0.3))
-                                fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])), height=250, margin=dict(l=30, r=30, t=30, b=20), paper_bgcolor='rgba(0,0,0,0)')
-                                st.plotly_chart(fig_radar, use_container_width=True)
-
-                            # --- ROW 2: ADVANCED KINETICS ---
-                            st.subheader("📉 Deep Dive Kinetics")
-                            c4, c5, c6 = st.columns(3)
-
-                            with c4:
-                                st.markdown("#### 4️⃣ Joint Angle Timeline")
-                                fig_line = go.Figure()
-                                fig_line.add_trace(go.Scatter(x=frames, y=knee_flexion, mode='lines', name='Flexion', line=dict(color='#636EFA')))
-                                fig_line.add_trace(go.Scatter(x=frames, y=valgus_stress, mode='lines', name='Valgus Stress', line=dict(color='#EF553B', dash='dot')))
-                                fig_line.update_layout(
-                                    xaxis_title="Frame (Time)", yaxis_title="Angle (°)", 
-                                    height=250, margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h", y=1.1),
-                                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="white")
-                                )
-                                st.plotly_chart(fig_line, use_container_width=True)
-
-                            with c5:
-                                st.markdown("#### 5️⃣ Ground Reaction Force (GRF)")
-                                fig_area = go.Figure()
-                                fig_area.add_trace(go.Scatter(x=frames, y=grf_left, stackgroup='one', name='Left Leg', line=dict(color='#00CC96')))
-                                fig_area.add_trace(go.Scatter(x=frames, y=grf_right, stackgroup='one', name='Right Leg', line=dict(color='#AB63FA')))
-                                fig_area.update_layout(
-                                    xaxis_title="Frame", yaxis_title="Force (N)", 
-                                    height=250, margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h", y=1.1),
-                                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="white")
-                                )
-                                st.plotly_chart(fig_area, use_container_width=True)
-
-                            with c6:
-                                st.markdown("#### 6️⃣ Limb Asymmetry Index")
-                                fig_bar = go.Figure()
-                                fig_bar.add_trace(go.Bar(x=['Left', 'Right'], y=[np.max(grf_left), np.max(grf_right)], marker_color=['#00CC96', '#AB63FA']))
-                                fig_bar.update_layout(
-                                    yaxis_title="Peak Force (N)", 
-                                    height=250, margin=dict(l=10, r=10, t=30, b=10),
-                                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="white")
-                                )
-                                st.plotly_chart(fig_bar, use_container_width=True)
+                        progress = st.progress(0.0, text="Processing Kinetic Chain...")
+                        st.session_state.video_result = {"file": file_key, "result": analyze_video_via_api(uploaded_file, progress)}
+                        progress.empty()
                     except Exception as e:
                         st.error(f"❌ Analysis Failed: {e}")
-                        st.warning("Please verify the video file format (MP4 recommended) and your internet connection.")
+                        st.warning("Please verify the video file format (MP4 recommended) and that the API is running.")
+
+                cached = st.session_state.get("video_result")
+                if cached and cached["file"] == file_key:
+                    result = cached["result"]
+                    legs = result["legs"]
+                    metrics = result["metrics"]
+                    series = (result.get("timeseries") or {}).get("series", {})
+                    peak_valgus = max(legs["left"]["valgus"], legs["right"]["valgus"])
+                    unstable = metrics["critical_state"] == "Unstable"
+
+                    # 1. METRIC CARDS
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Knee State", metrics["critical_state"], "High Risk" if unstable else "OK", delta_color="inverse" if unstable else "normal")
+                    m2.metric("Peak Valgus", metrics["peak_valgus"], f"L {legs['left']['valgus']:.1f}° / R {legs['right']['valgus']:.1f}°")
+                    m3.metric("Hip Rotation", metrics["hip_rotation"])
+                    m4.metric("Foot Strike", metrics["foot_strike"])
+
+                    st.divider()
+
+                    # --- ROW 1: CORE BIOMECHANICS ---
+                    c1, c2, c3 = st.columns(3)
+                    
+                    with c1:
+                        st.markdown("#### 1️⃣ Joint Dependency Graph")
+                        fig_gnn = go.Figure()
+                        nodes = ["Hip", "Knee", "Ankle", "Foot"]
+                        x_nodes = [1, 2, 2, 1]
+                        y_nodes = [3, 2, 1, 0]
+                        hip_color = '#00CC96' if metrics["hip_rotation"] == "Normal" else '#EF553B'
+                        knee_color = '#EF553B' if peak_valgus > 10 else '#00CC96'
+                        fig_gnn.add_trace(go.Scatter(x=x_nodes, y=y_nodes, mode='lines', line=dict(color='#30363D', width=2), hoverinfo='none'))
+                        fig_gnn.add_trace(go.Scatter(
+                            x=x_nodes, y=y_nodes, mode='markers+text', text=nodes, textposition="top right",
+                            marker=dict(size=20, color=[hip_color, knee_color, '#FFA15A', '#00CC96'])
+                        ))
+                        fig_gnn.update_layout(height=250, margin=dict(l=10, r=10, t=10, b=10), xaxis=dict(visible=False), yaxis=dict(visible=False), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+                        st.plotly_chart(fig_gnn, use_container_width=True)
+
+                    with c2:
+                        st.markdown("#### 2️⃣ Dynamic ACL Risk Gauge")
+                        fig_gauge = go.Figure(go.Indicator(
+                            mode = "gauge+number", value = round(peak_valgus, 1),
+                            domain = {'x': [0, 1], 'y': [0, 1]},
+                            gauge = {
+                                'axis': {'range': [0, 30]}, 
+                                'bar': {'color': "#EF553B"},
+                                'steps': [{'range': [0, 15], 'color': "#00CC96"}, {'range': [15, 30], 'color': "#30363D"}]
+                            }
+                        ))
+                        fig_gauge.update_layout(height=250, margin=dict(l=20, r=20, t=30, b=20), paper_bgcolor='rgba(0,0,0,0)')
+                        st.plotly_chart(fig_gauge, use_container_width=True)
+
+                    with c3:
+                        st.markdown("#### 3️⃣ Movement Quality Profile")
+                        scores = leg_radar_scores(legs)
+                        fig_radar = go.Figure()
+                        fig_radar.add_trace(go.Scatterpolar(r=list(scores.values()), theta=list(scores), fill='toself', name='Athlete', line_color='#EF553B'))
+                        fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])), height=250, margin=dict(l=30, r=30, t=30, b=20), paper_bgcolor='rgba(0,0,0,0)')
+                        st.plotly_chart(fig_radar, use_container_width=True)
+
+                    # --- ROW 2: PER-FRAME KINEMATICS ---
+                    st.subheader("📉 Deep Dive Kinematics")
+                    c4, c5, c6 = st.columns(3)
+
+                    with c4:
+                        st.markdown("#### 4️⃣ Knee Valgus Timeline")
+                        fig_line = go.Figure()
+                        for side, color in (("left", '#636EFA'), ("right", '#EF553B')):
+                            s = series.get(f"{side}_valgus")
+                            if s:
+                                fig_line.add_trace(go.Scatter(x=s["frame"], y=s["value"], mode='lines', name=f'{side.title()} Valgus', line=dict(color=color)))
+                        fig_line.update_layout(
+                            xaxis_title="Frame (Time)", yaxis_title="Angle (°)", 
+                            height=250, margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h", y=1.1),
+                            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="white")
+                        )
+                        st.plotly_chart(fig_line, use_container_width=True)
+
+                    with c5:
+                        st.markdown("#### 5️⃣ Knee Tracking (Hip Deviation)")
+                        fig_hip = go.Figure()
+                        for side, color in (("left", '#00CC96'), ("right", '#AB63FA')):
+                            s = series.get(f"{side}_hip_deviation")
+                            if s:
+                                fig_hip.add_trace(go.Scatter(x=s["frame"], y=s["value"], mode='lines', name=f'{side.title()} Leg', line=dict(color=color)))
+                        fig_hip.update_layout(
+                            xaxis_title="Frame", yaxis_title="Deviation (x leg length)", 
+                            height=250, margin=dict(l=10, r=10, t=30, b=10), legend=dict(orientation="h", y=1.1),
+                            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="white")
+                        )
+                        st.plotly_chart(fig_hip, use_container_width=True)
+
+                    with c6:
+                        st.markdown("#### 6️⃣ Limb Asymmetry Index")
+                        fig_bar = go.Figure()
+                        fig_bar.add_trace(go.Bar(x=['Left', 'Right'], y=[legs["left"]["valgus"], legs["right"]["valgus"]], marker_color=['#00CC96', '#AB63FA']))
+                        fig_bar.update_layout(
+                            yaxis_title="Peak Valgus (°)", 
+                            height=250, margin=dict(l=10, r=10, t=30, b=10),
+                            paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color="white")
+                        )
+                        st.plotly_chart(fig_bar, use_container_width=True)
 
             else:
                 st.info("👈 Waiting for video upload to initialize engine...")
@@ -366,19 +456,20 @@ def render_coach_view():
     # =========================================================
     with tab2:
         st.subheader("📂 Squad Management System")
-        team_file = st.file_uploader("Upload 'team_data.csv'", type=['csv'])
+        team_file = st.file_uploader("Upload 'team_data.csv'", type=['csv', 'xlsx'])
         
         if team_file:
-            df = pd.read_csv(team_file)
-            df.columns = df.columns.str.strip()
+            # Stored squad snapshot (computed once by the API), rendered as-is; parse locally if it's offline
+            snapshot = fetch_squad_snapshot(team_file) or local_squad_report(team_file)
+            kpis, charts = snapshot["kpis"], snapshot["charts"]
+            df = pd.DataFrame(charts["scatter"]) # Scatter + heatmap only
             
             # --- KPI ROW ---
-            avg_risk = df['Risk Score'].mean()
             k1, k2, k3, k4 = st.columns(4)
-            k1.metric("Squad Readiness", "85%", "Match Day Ready")
-            k2.metric("High Risk Players", len(df[df['Risk Score'] > 50]), "Critical Monitor", delta_color="inverse")
-            k3.metric("Avg Acute Load", f"{df['Acute Load'].mean():.1f}", "Normal")
-            k4.metric("Compliance", "98%", "+2%")
+            k1.metric("Squad Readiness", kpis["squad_readiness"], "Match Day Ready")
+            k2.metric("High Risk Players", kpis["high_risk_players"], "Critical Monitor", delta_color="inverse")
+            k3.metric("Avg Acute Load", f"{kpis['avg_load']:.1f}", "Normal")
+            k4.metric("Compliance", kpis["compliance"], "+2%")
             
             st.divider()
 
@@ -406,7 +497,8 @@ def render_coach_view():
 
             with c3:
                 st.markdown("#### 3️⃣ ACWR Distribution")
-                fig_bar = go.Figure(data=[go.Bar(x=df['Player'], y=df['Acute Load'], marker_color='#636EFA')])
+                acwr = charts["acwr_dist"]
+                fig_bar = go.Figure(data=[go.Bar(x=[a["name"] for a in acwr], y=[a["value"] for a in acwr], marker_color='#636EFA')])
                 fig_bar.update_layout(template="plotly_dark", height=300, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
                 st.plotly_chart(fig_bar, use_container_width=True)
 
@@ -414,23 +506,26 @@ def render_coach_view():
             c4, c5, c6 = st.columns(3)
             with c4:
                 st.markdown("#### 4️⃣ Risk Zone Breakdown")
-                df['Zone'] = pd.cut(df['Risk Score'], bins=[0, 30, 60, 100], labels=['Green', 'Orange', 'Red'])
-                fig_pie = px.pie(df, names='Zone', color='Zone', color_discrete_map={'Green':'#00CC96', 'Orange':'#FFA15A', 'Red':'#EF553B'}, template="plotly_dark")
-                fig_pie.update_layout(height=300, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+                zones = charts["risk_zones"]
+                fig_pie = go.Figure(data=[go.Pie(labels=[z["name"] for z in zones], values=[z["value"] for z in zones], marker_colors=[z["color"] for z in zones])])
+                fig_pie.update_layout(template="plotly_dark", height=300, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
                 st.plotly_chart(fig_pie, use_container_width=True)
 
             with c5:
                 st.markdown("#### 5️⃣ Training Compliance")
-                fig_donut = go.Figure(data=[go.Pie(labels=['Completed', 'Missed'], values=[92, 8], hole=.6, marker_colors=['#00CC96', '#EF553B'])])
-                fig_donut.update_layout(showlegend=False, template="plotly_dark", height=300, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', annotations=[dict(text='92%', x=0.5, y=0.5, font_size=20, showarrow=False)])
+                compliance = charts["compliance"]
+                done = compliance[0]["value"] if compliance else 0
+                fig_donut = go.Figure(data=[go.Pie(labels=[c["name"] for c in compliance], values=[c["value"] for c in compliance], hole=.6, marker_colors=[c["color"] for c in compliance])])
+                fig_donut.update_layout(showlegend=False, template="plotly_dark", height=300, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', annotations=[dict(text=f'{done}%', x=0.5, y=0.5, font_size=20, showarrow=False)])
                 st.plotly_chart(fig_donut, use_container_width=True)
 
             with c6:
                 st.markdown("#### 6️⃣ Wellness vs Load Trend")
                 fig_dual = make_subplots(specs=[[{"secondary_y": True}]])
-                sorted_df = df.sort_values('Acute Load')
-                fig_dual.add_trace(go.Bar(x=sorted_df['Player'], y=sorted_df['Acute Load'], name="Load", marker_color='#636EFA'), secondary_y=False)
-                fig_dual.add_trace(go.Scatter(x=sorted_df['Player'], y=sorted_df['Recovery'], name="Wellness", line=dict(color='#FFA15A', width=3)), secondary_y=True)
+                trend = charts["trend"] # Already ordered by Acute Load
+                names = [t["name"] for t in trend]
+                fig_dual.add_trace(go.Bar(x=names, y=[t["load"] for t in trend], name="Load", marker_color='#636EFA'), secondary_y=False)
+                fig_dual.add_trace(go.Scatter(x=names, y=[t["recovery"] for t in trend], name="Wellness", line=dict(color='#FFA15A', width=3)), secondary_y=True)
                 fig_dual.update_layout(template="plotly_dark", height=300, paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', legend=dict(orientation="h", y=1.1))
                 st.plotly_chart(fig_dual, use_container_width=True)
 
@@ -0,0 +1,27 @@
+import sys
+import os
+import time
+
+# Ensure we can import app
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.services.history_export import export_parquet
+
+# Exports player_history to a Parquet dataset partitioned by player and month (needs pyarrow).
+# Usage: python export_history.py [output_dir]
+
+
+def run(root=None):
+    root = root or settings.HISTORY_EXPORT_DIR
+    started = time.perf_counter()
+    try:
+        rows = export_parquet(root)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        raise
+    print(f"✅ {rows} history rows -> {root} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1] if len(sys.argv) > 1 else None)
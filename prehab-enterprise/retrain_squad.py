@@ -0,0 +1,48 @@
+import sys
+import os
+import time
+
+# Ensure we can import app
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.ml.anomaly_engine import AnomalyService
+from app.ml.model_registry import ModelRegistry
+from app.services.history_export import export_parquet, history_matrices, read_history
+
+# Full-squad GRU retrain + anomaly scan from the Parquet history export:
+# histories come out of Arrow as NumPy arrays, no ORM rows are built.
+# Usage: python retrain_squad.py [dataset_dir] [--export]
+
+
+def run(root=None, export=False):
+    root = root or settings.HISTORY_EXPORT_DIR
+    if export or not os.path.isdir(root):
+        print(f"✅ Exported {export_parquet(root)} rows to {root}")
+
+    started = time.perf_counter()
+    histories = history_matrices(read_history(root))
+    print(f"✅ Loaded {len(histories)} players in {time.perf_counter() - started:.2f}s")
+
+    # One vectorized anomaly pass over the whole squad
+    masks = AnomalyService().detect_squad(list(histories.values()))
+    flagged = masks["any"].sum(axis=1)
+    for player_id, count in zip(histories, flagged):
+        if count:
+            print(f"⚠️ {player_id}: {int(count)} anomalous days")
+
+    registry = ModelRegistry()
+    trained = 0
+    started = time.perf_counter()
+    for player_id, history in histories.items():
+        try:
+            if registry.train(player_id, history):
+                trained += 1
+        except Exception as e:
+            print(f"⚠️ Retrain failed for {player_id}: {e}")
+    print(f"✅ Retrained {trained}/{len(histories)} players in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--export"]
+    run(args[0] if args else None, export="--export" in sys.argv)
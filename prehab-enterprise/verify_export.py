@@ -0,0 +1,61 @@
+import os
+import time
+import tempfile
+import numpy as np
+import torch
+
+from app.ml.lstm_engine import PredictiveService
+
+# Parity check: exported TorchScript inference path vs the eager model
+TOLERANCE = 1e-4
+
+
+def verify_export():
+    rng = np.random.default_rng(7)
+    history = np.column_stack([
+        rng.uniform(300, 900, 45), rng.uniform(40, 100, 45), rng.uniform(5, 9, 45)
+    ]).tolist()
+
+    eager = PredictiveService()
+    eager.train_on_history(history)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gru.ts")
+        eager.export(path, metadata={"fingerprint": "parity"})
+        exported, meta = PredictiveService.load_exported(path)
+
+    # 1. Same forecast
+    eager_curve = np.array(eager.predict_next_15_days(history))
+    exported_curve = np.array(exported.predict_next_15_days(history))
+    max_diff = float(np.max(np.abs(eager_curve - exported_curve)))
+    print(f"Forecast max abs diff: {max_diff:.2e}")
+
+    # 2. Same raw model output on random windows
+    windows = torch.rand(32, 7, 3)
+    eager.model.eval()
+    with torch.no_grad():
+        raw_diff = float((eager.model(windows) - exported.model(windows)).abs().max())
+    print(f"Raw output max abs diff: {raw_diff:.2e}")
+
+    # 3. Inference-only really is inference-only
+    assert not hasattr(exported, "optimizer"), "Exported service should not build an optimizer"
+    assert not any(p.requires_grad for p in exported.model.parameters()), "Exported params should not require grad"
+    assert meta["fingerprint"] == "parity"
+
+    # 4. Latency
+    for name, service in (("Eager", eager), ("TorchScript", exported)):
+        service.predict_next_15_days(history)
+        start = time.perf_counter()
+        for _ in range(100):
+            service.predict_next_15_days(history)
+        print(f"{name:>12}: {(time.perf_counter() - start) * 10:.2f} ms / forecast")
+
+    if max_diff <= TOLERANCE and raw_diff <= TOLERANCE:
+        print("✅ Exported model matches eager model")
+    else:
+        print("❌ Exported model drifted from eager model")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    verify_export()